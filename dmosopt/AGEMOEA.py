@@ -17,13 +17,15 @@ from dmosopt.dda import dda_non_dominated_sort
 from dmosopt.MOEA import (
     Struct,
     MOEA,
-    crossover_sbx,
-    mutation,
+    generate_offspring,
     tournament_selection,
     remove_duplicates,
 )
 from typing import Any, Union, Dict, List, Tuple, Optional
 
+# Upper bound on the number of elements of temporary distance arrays
+DEFAULT_BLOCK_ELEMENTS = 1 << 22
+
 
 class AGEMOEA(MOEA):
     def __init__(
@@ -136,44 +138,19 @@ class AGEMOEA(MOEA):
         )
         pool = population_parm[pool_idxs, :]
 
-        count = 0
-        xs_gen = []
-
-        while count < popsize - 1:
-            if local_random.random() < crossover_prob:
-                parentidx = local_random.choice(poolsize, 2, replace=False)
-                parent1 = pool[parentidx[0], :]
-                parent2 = pool[parentidx[1], :]
-                children1, children2 = crossover_sbx(
-                    local_random,
-                    parent1,
-                    parent2,
-                    di_crossover,
-                    xlb,
-                    xub,
-                    nchildren=nchildren,
-                )
-                child1 = children1[0]
-                child2 = children2[0]
-                xs_gen.extend([child1, child2])
-                count += 2
-            if local_random.random() < mutation_prob:
-                parentidx = local_random.integers(low=0, high=poolsize)
-                parent = pool[parentidx, :]
-                children = mutation(
-                    local_random,
-                    parent,
-                    di_mutation,
-                    xlb,
-                    xub,
-                    mutation_rate=mutation_rate,
-                    nchildren=nchildren,
-                )
-                child = children[0]
-                xs_gen.append(child)
-                count += 1
-
-        x_gen = np.vstack(xs_gen)
+        x_gen = generate_offspring(
+            local_random,
+            pool,
+            popsize - 1,
+            crossover_prob,
+            mutation_prob,
+            di_crossover,
+            di_mutation,
+            xlb,
+            xub,
+            mutation_rate=mutation_rate,
+            nchildren=nchildren,
+        )
         return x_gen, {}
 
     def update_strategy(
@@ -277,10 +254,21 @@ def normalize(front, extreme):
     return normalization
 
 
-def minkowski_distances(A, B, p):
-    """workaround for scipy's cdist refusing p<1"""
-    i_ind, j_ind = np.meshgrid(np.arange(A.shape[0]), np.arange(B.shape[0]))
-    return np.power(np.power(np.abs(A[i_ind] - B[j_ind]), p).sum(axis=2), 1.0 / p)
+def minkowski_distances(A, B, p, block_size=None):
+    """Minkowski distances between the rows of A and B (workaround for
+    scipy's cdist refusing p<1); the result has shape (len(B), len(A)).
+    block_size: number of rows of B processed at a time (default bounds
+    the temporary arrays to about DEFAULT_BLOCK_ELEMENTS elements)
+    """
+    if block_size is None:
+        block_size = max(1, DEFAULT_BLOCK_ELEMENTS // max(1, A.shape[0] * A.shape[1]))
+    D = np.empty((B.shape[0], A.shape[0]))
+    for start in range(0, B.shape[0], block_size):
+        Bb = B[start : start + block_size]
+        D[start : start + block_size] = np.power(
+            np.power(np.abs(A[None, :, :] - Bb[:, None, :]), p).sum(axis=2), 1.0 / p
+        )
+    return D
 
 
 def get_geometry(front, extreme):
@@ -302,15 +290,11 @@ def get_geometry(front, extreme):
 
 
 def point_2_line_distance(P, A, B):
-    d = np.zeros(P.shape[0])
-
-    for i in range(P.shape[0]):
-        pa = P[i] - A
-        ba = B - A
-        t = np.dot(pa, ba) / np.dot(ba, ba)
-        d[i] = np.linalg.norm(pa - t * ba, 2)
-
-    return d
+    """Euclidean distances of the rows of P to the line through A and B."""
+    pa = P - A
+    ba = B - A
+    t = np.dot(pa, ba) / np.dot(ba, ba)
+    return np.linalg.norm(pa - t[:, None] * ba, 2, axis=1)
 
 
 def find_corner_solutions(front):
@@ -362,32 +346,34 @@ def survival_score(y, front, ideal_point):
     selected[extreme] = True
 
     nn = np.linalg.norm(ynfront, p, axis=1)
-    distances = minkowski_distances(ynfront, ynfront, p=p)
-    distances = distances / nn[:, None]
 
+    # Greedily select the remaining solution whose two nearest selected
+    # neighbors are farthest away (distances are normalized by the norm
+    # of the selected solution). The two smallest distances of each
+    # solution to the selected set are kept and updated with the
+    # distances to each newly selected solution.
     neighbors = 2
-    remaining = np.arange(m)
-    remaining = list(remaining[~selected])
-
-    for i in range(m - np.sum(selected)):
-        mg = np.meshgrid(np.arange(selected.shape[0])[selected], remaining)
-        D_mg = distances[
-            tuple(mg)
-        ]  # avoid Numpy's future deprecation of array special indexing
-
-        if D_mg.shape[1] > 1:
-            # equivalent to mink(distances(remaining, selected),neighbors,2); in Matlab
-            maxim = np.argpartition(D_mg, neighbors - 1, axis=1)[:, :neighbors]
-            tmp = np.sum(np.take_along_axis(D_mg, maxim, axis=1), axis=1)
-            index: int = np.argmax(tmp)
-            d = tmp[index]
+    D = minkowski_distances(ynfront[selected], ynfront, p=p) / nn[selected]
+    nearest = np.full((m, neighbors), np.inf)
+    k = min(neighbors, D.shape[1])
+    nearest[:, :k] = np.sort(D, axis=1)[:, :k]
+    n_selected = np.count_nonzero(selected)
+
+    for i in range(m - n_selected):
+        if n_selected > 1:
+            score = nearest[:, 0] + nearest[:, 1]
         else:
-            index = D_mg[:, 0].argmax()
-            d = D_mg[index, 0]
-
-        best = remaining.pop(index)
+            score = nearest[:, 0].copy()
+        score[selected] = -np.inf
+        best = np.argmax(score)
         selected[best] = True
-        crowd_dist[best] = d
+        n_selected += 1
+        crowd_dist[best] = score[best]
+
+        d = minkowski_distances(ynfront[best][None, :], ynfront, p=p)[:, 0] / nn[best]
+        closer = d < nearest[:, 0]
+        nearest[:, 1] = np.where(closer, nearest[:, 0], np.minimum(nearest[:, 1], d))
+        nearest[:, 0] = np.where(closer, d, nearest[:, 0])
 
     return normalization, p, crowd_dist
 
@@ -7,7 +7,6 @@
 ### https://github.com/DEAP/deap/blob/master/deap/cma.py
 ###
 
-from functools import partial
 import numpy as np
 from dmosopt.dda import dda_non_dominated_sort
 from dmosopt.MOEA import (
@@ -16,7 +15,7 @@ from dmosopt.MOEA import (
     remove_worst,
     remove_duplicates,
 )
-from dmosopt.indicators import Hypervolume
+from dmosopt.indicators import Hypervolume, MonteCarloHypervolume
 from typing import Any, Union, Dict, List, Tuple, Optional
 
 
@@ -75,6 +74,8 @@ class CMAES(MOEA):
 
         self.state = None
         self.indicator = Hypervolume
+        if self.opt_params.approx_hypervolume:
+            self.indicator = MonteCarloHypervolume
 
     @property
     def default_parameters(self) -> Dict[str, Any]:
@@ -110,6 +111,8 @@ class CMAES(MOEA):
             "ccov": ccov,
             "pthresh": pthresh,
             "di_mutation": 1.0,
+            "approx_hypervolume": False,
+            "hypervolume_rel_tol": 0.01,
         }
 
         return params
@@ -161,7 +164,7 @@ class CMAES(MOEA):
         popsize = self.popsize
 
         if candidates_x.shape[0] <= popsize:
-            return np.ones_like(candidates_inds, dtype=bool_), np.zeros_like(
+            return np.ones_like(candidates_inds, dtype=bool), np.zeros_like(
                 candidates_inds, dtype=bool
             )
 
@@ -196,22 +199,18 @@ class CMAES(MOEA):
             # reference point is chosen in the complete population
             # as the worst in each dimension +1
             ref = np.max(candidates_y, axis=0) + 1
-            indicator = self.indicator(ref_point=ref, nds=True)
-
-            def contribution(front, i):
-                # The contribution of point p_i in point set P
-                # is the hypervolume of P without p_i
-                return indicator.do(
-                    np.concatenate(
-                        (candidates_y[front[:i]], candidates_y[front[i + 1 :]])
-                    )
-                )
-
-            contrib_values = np.fromiter(
-                map(partial(contribution, mid_front), range(len(mid_front))),
-                dtype=np.float32,
-            )
-            contrib_order = np.argsort(contrib_values)
+            indicator_params = {}
+            if self.opt_params.approx_hypervolume:
+                indicator_params = {
+                    "rel_tol": self.opt_params.hypervolume_rel_tol,
+                    "local_random": self.local_random,
+                }
+            indicator = self.indicator(ref_point=ref, nds=True, **indicator_params)
+
+            # the points with the largest exclusive hypervolume
+            # contributions to the front are chosen first
+            contrib_values = indicator.contributions(candidates_y[mid_front])
+            contrib_order = np.argsort(-contrib_values, kind="stable")
 
             chosen[mid_front[contrib_order[:k]]] = True
             not_chosen[mid_front[contrib_order[k:]]] = True
@@ -307,97 +306,87 @@ class CMAES(MOEA):
             self.opt_params.pthresh,
         )
 
-        # Make copies for chosen offspring only
-        chosen_offspring = np.logical_and(chosen, candidates_offspring)
-        sigmas = np.where(
-            chosen_offspring.reshape((-1, 1)),
-            self.state.sigmas[candidates_pidxs],
-            np.full((candidates_pidxs.shape[0], dim), np.nan),
-        )
-        last_steps = sigmas.copy()
-        Ainv = np.where(
-            chosen_offspring.reshape((-1, 1, 1)),
-            self.state.Ainv[candidates_pidxs],
-            np.nan,
-        )
-        A = np.where(
-            chosen_offspring.reshape((-1, 1, 1)), self.state.A[candidates_pidxs], np.nan
-        )
-        pc = np.where(
-            chosen_offspring.reshape((-1, 1)), self.state.pc[candidates_pidxs], np.nan
-        )
-        psucc = np.where(
-            chosen_offspring,
-            self.state.psucc[candidates_pidxs],
-            np.nan,
+        chosen_idxs = np.flatnonzero(chosen)
+        chosen_offspring = candidates_offspring[chosen_idxs]
+        chosen_pidxs = candidates_pidxs[chosen_idxs]
+        offspring_idxs = chosen_idxs[chosen_offspring]
+        offspring_pidxs = chosen_pidxs[chosen_offspring]
+
+        # Update the internal parameters of the successful offspring,
+        # starting from the parameters of their parents (Success = 1
+        # since they are chosen)
+        n_chosen = len(chosen_idxs)
+        sigmas = np.broadcast_to(
+            self.state.sigmas[chosen_pidxs].reshape((n_chosen, -1)), (n_chosen, dim)
+        ).copy()
+        last_steps = sigmas[chosen_offspring]
+        offspring_psucc = (1.0 - cp) * self.state.psucc[offspring_pidxs] + cp
+        sigma_factors = np.exp((offspring_psucc - ptarg) / (d * (1.0 - ptarg)))
+        offspring_sigmas = last_steps * sigma_factors.reshape((-1, 1))
+
+        z = (
+            np.divide(
+                candidates_x[offspring_idxs] - parents_x[offspring_pidxs], xub - xlb
+            )
+            / last_steps
         )
-
-        # Update the internal parameters for successful offspring
-        for ind in np.nonzero(chosen)[0]:
-            is_offspring = candidates_offspring[ind]
-            p_idx = candidates_pidxs[ind]
-
-            # Only the offspring update the parameter set
-            if is_offspring:
-                # Update (Success = 1 since it is chosen)
-                psucc[ind] = (1.0 - cp) * psucc[ind] + cp
-                sigma_factors = np.exp((psucc[ind] - ptarg) / (d * (1.0 - ptarg)))
-                sigmas[ind] = sigmas[ind] * sigma_factors
-
-                xp = candidates_x[ind]
-                x = parents_x[p_idx]
-                z = np.divide(xp - x, xub - xlb) / last_steps[ind]
-                A[ind], Ainv[ind], pc[ind] = updateCholesky(
-                    A[ind], Ainv[ind], z, psucc[ind], pc[ind], cc, ccov, pthresh
-                )
-
-                self.state.psucc[p_idx] = (1.0 - cp) * self.state.psucc[p_idx] + cp
-                psigma_factors = np.exp(
-                    (self.state.psucc[p_idx] - ptarg) / (d * (1.0 - ptarg))
-                )
-                self.state.sigmas[p_idx] = self.state.sigmas[p_idx] * psigma_factors
-
-        # Update the entire parameter set for not chosen individuals
-        for ind in np.nonzero(not_chosen)[0]:
-            is_offspring = candidates_offspring[ind]
-            p_idx = candidates_pidxs[ind]
-
-            # Only the offspring update the parameter set
-            if is_offspring:
-                self.state.psucc[p_idx] = (1.0 - cp) * self.state.psucc[p_idx]
-                self.state.sigmas[p_idx] = self.state.sigmas[p_idx] * np.exp(
-                    (self.state.psucc[p_idx] - ptarg) / (d * (1.0 - ptarg))
-                )
-
-        self.state.parents_x = candidates_x[chosen]
-        self.state.parents_y = candidates_y[chosen]
-
-        self.state.sigmas = np.where(
-            candidates_offspring[chosen].reshape((-1, 1)),
-            sigmas[chosen],
-            self.state.sigmas[candidates_pidxs[chosen]],
+        offspring_A, offspring_Ainv, offspring_pc = updateCholesky(
+            self.state.A[offspring_pidxs],
+            self.state.Ainv[offspring_pidxs],
+            z,
+            offspring_psucc,
+            self.state.pc[offspring_pidxs],
+            cc,
+            ccov,
+            pthresh,
         )
 
-        self.state.Ainv = np.where(
-            candidates_offspring[chosen].reshape((-1, 1, 1)),
-            Ainv[chosen],
-            self.state.Ainv[candidates_pidxs[chosen]],
-        )
-        self.state.A = np.where(
-            candidates_offspring[chosen].reshape((-1, 1, 1)),
-            A[chosen],
-            self.state.A[candidates_pidxs[chosen]],
-        )
-        self.state.pc = np.where(
-            candidates_offspring[chosen].reshape((-1, 1)),
-            pc[chosen],
-            self.state.pc[candidates_pidxs[chosen]],
-        )
-        self.state.psucc = np.where(
-            candidates_offspring[chosen],
-            psucc[chosen],
-            self.state.psucc[candidates_pidxs[chosen]],
+        # Update the parameters of the parents: once per successful
+        # offspring, then once per unsuccessful offspring; parents with
+        # several offspring are updated in successive rounds
+        n_success = np.bincount(offspring_pidxs, minlength=P)
+        n_failure = np.bincount(
+            candidates_pidxs[np.logical_and(not_chosen, candidates_offspring)],
+            minlength=P,
         )
+        sigma_shape = (-1,) + (1,) * (self.state.sigmas.ndim - 1)
+        for k in range(np.max(n_success, initial=0)):
+            update = n_success > k
+            self.state.psucc[update] = (1.0 - cp) * self.state.psucc[update] + cp
+            psigma_factors = np.exp(
+                (self.state.psucc[update] - ptarg) / (d * (1.0 - ptarg))
+            )
+            self.state.sigmas[update] *= psigma_factors.reshape(sigma_shape)
+        for k in range(np.max(n_failure, initial=0)):
+            update = n_failure > k
+            self.state.psucc[update] = (1.0 - cp) * self.state.psucc[update]
+            psigma_factors = np.exp(
+                (self.state.psucc[update] - ptarg) / (d * (1.0 - ptarg))
+            )
+            self.state.sigmas[update] *= psigma_factors.reshape(sigma_shape)
+
+        # The chosen parents keep their (updated) parameters, the chosen
+        # offspring get their own
+        sigmas = np.broadcast_to(
+            self.state.sigmas[chosen_pidxs].reshape((n_chosen, -1)), (n_chosen, dim)
+        ).copy()
+        sigmas[chosen_offspring] = offspring_sigmas
+        A = self.state.A[chosen_pidxs]
+        A[chosen_offspring] = offspring_A
+        Ainv = self.state.Ainv[chosen_pidxs]
+        Ainv[chosen_offspring] = offspring_Ainv
+        pc = self.state.pc[chosen_pidxs]
+        pc[chosen_offspring] = offspring_pc
+        psucc = self.state.psucc[chosen_pidxs]
+        psucc[chosen_offspring] = offspring_psucc
+
+        self.state.parents_x = candidates_x[chosen_idxs]
+        self.state.parents_y = candidates_y[chosen_idxs]
+        self.state.sigmas = sigmas
+        self.state.A = A
+        self.state.Ainv = Ainv
+        self.state.pc = pc
+        self.state.psucc = psucc
 
     def get_population_strategy(self):
         population_parm = self.state.parents_x.copy()
@@ -448,27 +437,53 @@ def sortMO(
 
 
 def updateCholesky(A, Ainv, z, psucc, pc, cc, ccov, pthresh):
-    alpha = None
-    if psucc < pthresh:
-        pc = (1.0 - cc) * pc + np.sqrt(cc * (2.0 - cc)) * z
-        alpha = 1.0 - ccov
-    else:
-        pc = (1.0 - cc) * pc
-        alpha = (1.0 - ccov) + ccov * cc * (2.0 - cc)
+    """Rank-one updates of a stack of Cholesky factors; A and Ainv are
+    updated in place.
+    A, Ainv: Cholesky factors and their inverses, (n, dim, dim)
+    z: normalized steps, (n, dim)
+    psucc: success probabilities, (n,)
+    pc: evolution paths, (n, dim)
+    """
+    is_low = psucc < pthresh
+    pc = np.where(
+        is_low.reshape((-1, 1)),
+        (1.0 - cc) * pc + np.sqrt(cc * (2.0 - cc)) * z,
+        (1.0 - cc) * pc,
+    )
+    alpha = np.where(is_low, 1.0 - ccov, (1.0 - ccov) + ccov * cc * (2.0 - cc))
 
     beta = ccov
-    w = np.dot(Ainv, pc)
+    w = np.einsum("nij,nj->ni", Ainv, pc)
 
     # Under this threshold, the update is mostly noise
-    if w.max() > 1e-20:
-        w_inv = np.dot(w, Ainv)
-        a = np.sqrt(alpha)
-        norm_w2 = np.sum(w**2)
-        root = np.sqrt(1 + beta / alpha * norm_w2)
-        b = a / norm_w2 * (root - 1)
-        A = a * A + b * np.outer(pc, w.T)
-
-        c = 1.0 / (a * norm_w2) * (1.0 - 1.0 / root)
-        Ainv = (1.0 / a) * Ainv - c * w * (w.T * Ainv)
+    update = np.max(w, axis=1, initial=-np.inf) > 1e-20
+    if not np.any(update):
+        return A, Ainv, pc
+    if np.all(update):
+        update = slice(None)
+    A_u = A[update]
+    Ainv_u = Ainv[update]
+    w = w[update]
+    alpha = alpha[update]
+
+    a = np.sqrt(alpha)
+    norm_w2 = np.sum(w**2, axis=1)
+    root = np.sqrt(1 + beta / alpha * norm_w2)
+    b = a / norm_w2 * (root - 1)
+    outer = np.einsum("ni,nj->nij", pc[update], w)
+    outer *= b.reshape((-1, 1, 1))
+    A_u *= a.reshape((-1, 1, 1))
+    A_u += outer
+
+    c = 1.0 / (a * norm_w2) * (1.0 - 1.0 / root)
+    w = w.reshape((-1, 1, w.shape[1]))
+    outer = w * Ainv_u
+    outer *= c.reshape((-1, 1, 1)) * w
+    Ainv_u *= (1.0 / a).reshape((-1, 1, 1))
+    Ainv_u -= outer
+
+    if not isinstance(update, slice):
+        A[update] = A_u
+        Ainv[update] = Ainv_u
 
     return A, Ainv, pc
@@ -6,6 +6,7 @@ import numpy as np
 from numpy.random import default_rng
 from typing import Any, Union, Dict, List, Tuple, Optional
 from dmosopt import MOEA, model
+from dmosopt.dda import non_dominated_front
 from dmosopt.datatypes import OptHistory, EpochResults
 from dmosopt.config import (
     import_object_by_path,
@@ -203,6 +204,9 @@ def epoch(
     surrogate_method_kwargs={"anisotropic": False, "optimizer": "sceua"},
     surrogate_custom_training=None,
     surrogate_custom_training_kwargs=None,
+    surrogate_hyperparameters=None,
+    surrogate=None,
+    surrogate_update=None,
     sensitivity_method_name=None,
     sensitivity_method_kwargs={},
     termination=None,
@@ -293,6 +297,12 @@ def epoch(
             logger.warning(f"Unable to fit feasibility model: {e}")
 
     # objective
+    if surrogate is not None and mdl.objective is None:
+        # refresh the surrogate of the previous epoch with the new
+        # evaluations instead of refitting it
+        mdl.objective = surrogate
+        if surrogate_update is not None:
+            update(mdl.objective, *surrogate_update, logger=logger)
     if surrogate_method_name is not None and mdl.objective is None:
         mdl.objective = train(
             nInput,
@@ -304,6 +314,7 @@ def epoch(
             C,
             surrogate_method_name=surrogate_method_name,
             surrogate_method_kwargs=surrogate_method_kwargs,
+            initial_hyperparameters=surrogate_hyperparameters,
             logger=logger,
             file_path=file_path,
         )
@@ -433,6 +444,11 @@ def epoch(
             "optimizer": optimizer,
             "stats": stats,
         }
+        if hasattr(mdl.objective, "update"):
+            return_dict["surrogate"] = mdl.objective
+        if hasattr(mdl.objective, "get_hyperparameters"):
+            hyperparameters = mdl.objective.get_hyperparameters()
+            return_dict["surrogate_hyperparameters"] = hyperparameters
     else:
         return_dict = {
             "best_x": best_x,
@@ -457,6 +473,7 @@ def train(
     C,
     surrogate_method_name="gpr",
     surrogate_method_kwargs={"anisotropic": False, "optimizer": "sceua"},
+    initial_hyperparameters=None,
     logger=None,
     file_path=None,
 ):
@@ -469,6 +486,8 @@ def train(
     xlb: lower bound of input
     xub: upper bound of input
     Xinit and Yinit: initial samplers for surrogate model construction
+    initial_hyperparameters: hyperparameters of a previous fit, used to
+    warm-start surrogate methods that provide get_hyperparameters
     """
 
     x = Xinit.copy()
@@ -490,6 +509,12 @@ def train(
         surrogate_method_name = default_surrogate_methods[surrogate_method_name]
 
     surrogate_method_cls = import_object_by_path(surrogate_method_name)
+    if initial_hyperparameters is not None and hasattr(
+        surrogate_method_cls, "get_hyperparameters"
+    ):
+        surrogate_method_kwargs = dict(
+            surrogate_method_kwargs, initial_hyperparameters=initial_hyperparameters
+        )
     sm = surrogate_method_cls(
         x,
         y,
@@ -504,6 +529,37 @@ def train(
     return sm
 
 
+def update(sm, Xnew, Ynew, C=None, logger=None):
+    """
+    Adds new training points to a surrogate model that provides an
+    update method, without refitting its hyperparameters.
+
+    sm: surrogate model returned by train
+    Xnew and Ynew: new input and output samples
+    C: constraint values of the new samples; infeasible samples are
+    not added
+    Samples that duplicate each other or the training inputs sm.xin of
+    the surrogate model, if it provides them, are not added either.
+    """
+    x = Xnew
+    y = Ynew
+    if C is not None:
+        feasible = np.all(C > 0.0, axis=1)
+        x = x[feasible, :]
+        y = y[feasible, :]
+
+    xin = getattr(sm, "xin", np.empty((0, x.shape[1])))
+    is_duplicate = MOEA.get_duplicates(np.vstack((xin, x)))[xin.shape[0] :]
+    x = x[~is_duplicate, :]
+    y = y[~is_duplicate, :]
+    if x.shape[0] > 0:
+        if logger is not None:
+            logger.info(f"Updating surrogate model with {x.shape[0]} new samples")
+        sm.update(x, y)
+
+    return sm
+
+
 def analyze_sensitivity(
     sm,
     xlb,
@@ -562,6 +618,7 @@ def get_best(
     return_perm=False,
     return_feasible=False,
     delete_duplicates=True,
+    max_memory=None,
 ):
     xtmp = x
     ytmp = y
@@ -587,24 +644,30 @@ def get_best(
             f = f[~is_duplicate]
         if c is not None:
             c = c[~is_duplicate]
+        if epochs is not None:
+            epochs = epochs[~is_duplicate]
 
-    xtmp, ytmp, rank, _, perm = MOEA.sortMO(xtmp, ytmp, return_perm=True)
-    idxp = rank == 0
+    perm = None
+    if return_perm:
+        _, _, rank, _, perm = MOEA.sortMO(
+            xtmp, ytmp, return_perm=True, max_memory=max_memory
+        )
+        idxp = perm[rank == 0]
+    else:
+        # only the first front is needed
+        idxp = non_dominated_front(ytmp)
     best_x = xtmp[idxp, :]
     best_y = ytmp[idxp, :]
     best_f = None
     if f is not None:
-        best_f = f[perm][idxp]
+        best_f = f[idxp]
     best_c = None
     if c is not None:
-        best_c = c[perm, :][idxp, :]
+        best_c = c[idxp, :]
 
     best_epoch = None
     if epochs is not None:
-        best_epoch = epochs[perm][idxp]
-
-    if not return_perm:
-        perm = None
+        best_epoch = epochs[idxp]
     if return_feasible:
         return best_x, best_y, best_f, best_c, best_epoch, perm, feasible
     else:
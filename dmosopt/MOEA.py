@@ -3,10 +3,15 @@
 #
 
 import numpy as np
-from functools import reduce
-from dmosopt.dda import dda_non_dominated_sort
+from functools import lru_cache
+from itertools import chain
+from dmosopt.dda import (
+    UNRANKED,
+    dda_non_dominated_sort,
+    incremental_non_dominated_sort,
+)
 from dmosopt import sampling
-from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
 from typing import Any, Union, Dict, List, Tuple, Optional
 
 # function sharedmoea(selfunc,μ,λ)
@@ -236,21 +241,151 @@ def crossover_sbx(local_random, parent1, parent2, di_crossover, xlb, xub, nchild
     return children1, children2
 
 
-def sortMO(
-    x,
-    y,
-    return_perm=False,
-    x_distance_metrics=None,
-    y_distance_metrics=None,
+def mutation_batch(
+    local_random, parents, di_mutation, xlb, xub, mutation_rate=0.5, nchildren=1
 ):
-    """Non-dominated sort for multi-objective optimization
-    x: input parameter matrix
-    y: output objectives matrix
-    return_perm: if True, return permutation indices of original input
+    """Polynomial Mutation of each row of parents
+    parents: sample points before mutation, [m,n]
+    di_mutation: distribution index for mutation
+    nchildren: number of children per parent; the children of each
+    parent are consecutive rows of the result, [m*nchildren,n]
+
+    The random numbers are drawn in the same order as by calling
+    mutation on each parent in turn.
+    """
+    parents = np.repeat(parents, nchildren, axis=0)
+    m, n = parents.shape
+    di_mutation = np.broadcast_to(di_mutation, (n,))
+    u = local_random.random((m, n))
+    delta = np.where(
+        u < mutation_rate,
+        (2.0 * u) ** (1.0 / (di_mutation + 1)) - 1.0,
+        1.0 - (2.0 * (1.0 - u)) ** (1.0 / (di_mutation + 1)),
+    )
+    return np.clip(parents + (xub - xlb) * delta, xlb, xub)
+
+
+def crossover_sbx_batch(
+    local_random, parents1, parents2, di_crossover, xlb, xub, nchildren=1
+):
+    """SBX (Simulated Binary Crossover) of each pair of rows of parents1
+    and parents2
+    di_crossover: distribution index for crossover
+    nchildren: number of pairs of children per pair of parents; the
+    children of each pair are consecutive rows of the results,
+    [m*nchildren,n]
+
+    The random numbers are drawn in the same order as by calling
+    crossover_sbx on each pair in turn.
+    """
+    parents1 = np.repeat(parents1, nchildren, axis=0)
+    parents2 = np.repeat(parents2, nchildren, axis=0)
+    m, n = parents1.shape
+    di_crossover = np.broadcast_to(di_crossover, (n,))
+    u = local_random.random((m, n))
+    beta = np.where(
+        u <= 0.5,
+        (2.0 * u) ** (1.0 / (di_crossover + 1)),
+        (1.0 / (2.0 * (1.0 - u))) ** (1.0 / (di_crossover + 1)),
+    )
+    children1 = np.clip(0.5 * ((1 - beta) * parents1 + (1 + beta) * parents2), xlb, xub)
+    children2 = np.clip(0.5 * ((1 + beta) * parents1 + (1 - beta) * parents2), xlb, xub)
+    return children1, children2
+
+
+def generate_offspring(
+    local_random,
+    pool,
+    count,
+    crossover_prob,
+    mutation_prob,
+    di_crossover,
+    di_mutation,
+    xlb,
+    xub,
+    mutation_rate=0.5,
+    nchildren=1,
+):
+    """Generates at least count offspring from the mating pool.
+
+    Each step applies SBX crossover to two distinct parents with
+    probability crossover_prob, creating nchildren pairs of children, and
+    polynomial mutation to one parent with probability mutation_prob,
+    creating nchildren children, until count offspring have been created.
+    The steps are drawn in batches and the operators are applied to all
+    selected parents at once.
+    """
+    poolsize, n = pool.shape
+    if count <= 0:
+        return np.empty((0, n))
+    if crossover_prob <= 0.0 and mutation_prob <= 0.0:
+        raise RuntimeError(
+            "generate_offspring: crossover_prob or mutation_prob must be positive"
+        )
+
+    is_crossover = []
+    is_mutation = []
+    total = 0
+    while total < count:
+        step_crossover = local_random.random(count) < crossover_prob
+        step_mutation = local_random.random(count) < mutation_prob
+        step_size = nchildren * (2 * step_crossover + step_mutation)
+        step_total = total + np.cumsum(step_size)
+        last = min(np.searchsorted(step_total, count), count - 1)
+        is_crossover.append(step_crossover[: last + 1])
+        is_mutation.append(step_mutation[: last + 1])
+        total = step_total[last]
+    is_crossover = np.concatenate(is_crossover)
+    is_mutation = np.concatenate(is_mutation)
+
+    n_crossover = np.count_nonzero(is_crossover)
+    n_mutation = np.count_nonzero(is_mutation)
+    parentidx1 = local_random.integers(low=0, high=poolsize, size=n_crossover)
+    parentidx2 = local_random.integers(low=0, high=poolsize - 1, size=n_crossover)
+    parentidx2[parentidx2 >= parentidx1] += 1
+    children1, children2 = crossover_sbx_batch(
+        local_random,
+        pool[parentidx1],
+        pool[parentidx2],
+        di_crossover,
+        xlb,
+        xub,
+        nchildren=nchildren,
+    )
+    parentidx = local_random.integers(low=0, high=poolsize, size=n_mutation)
+    mutants = mutation_batch(
+        local_random,
+        pool[parentidx],
+        di_mutation,
+        xlb,
+        xub,
+        mutation_rate=mutation_rate,
+        nchildren=nchildren,
+    )
+
+    # offspring are laid out in the order of the steps that created them,
+    # the children of a crossover step as alternating pairs
+    step_size = nchildren * (2 * is_crossover + is_mutation)
+    offset = np.cumsum(step_size) - step_size
+    child = np.arange(nchildren)
+    crossover_offset = (offset[is_crossover, None] + 2 * child).ravel()
+    mutation_offset = offset[is_mutation] + 2 * nchildren * is_crossover[is_mutation]
+    x_gen = np.empty((total, n))
+    x_gen[crossover_offset] = children1
+    x_gen[crossover_offset + 1] = children2
+    x_gen[(mutation_offset[:, None] + child).ravel()] = mutants
+
+    return x_gen
+
+
+def distance_functions(x_distance_metrics=None, y_distance_metrics=None):
+    """Resolves the distance metrics used to order solutions of equal rank
+    x_distance_metrics: list of callables applied to the input parameters
+    y_distance_metrics: list of callables or metric names ("crowding",
+    "euclidean") applied to the objectives
     """
     y_distance_functions = []
     if y_distance_metrics is not None:
-        y_distance_functions = []
         assert len(y_distance_metrics) > 0
         for distance_metric in y_distance_metrics:
             if callable(distance_metric):
@@ -259,8 +394,6 @@ def sortMO(
                 y_distance_functions.append(crowding_distance)
             elif distance_metric == "euclidean":
                 y_distance_functions.append(euclidean_distance)
-            elif callable(distance_metric):
-                y_distance_functions.append(distance_metric)
             else:
                 raise RuntimeError(f"sortMO: unknown distance metric {distance_metric}")
 
@@ -272,7 +405,31 @@ def sortMO(
             else:
                 raise RuntimeError(f"sortMO: unknown distance metric {distance_metric}")
 
-    rank = dda_non_dominated_sort(y)
+    return x_distance_functions, y_distance_functions
+
+
+def sortMO(
+    x,
+    y,
+    return_perm=False,
+    x_distance_metrics=None,
+    y_distance_metrics=None,
+    rank=None,
+    max_memory=None,
+):
+    """Non-dominated sort for multi-objective optimization
+    x: input parameter matrix
+    y: output objectives matrix
+    return_perm: if True, return permutation indices of original input
+    rank: optional precomputed non-dominated ranks of y
+    max_memory: optional upper bound in bytes on the memory used for ranking
+    """
+    x_distance_functions, y_distance_functions = distance_functions(
+        x_distance_metrics, y_distance_metrics
+    )
+
+    if rank is None:
+        rank = dda_non_dominated_sort(y, max_memory=max_memory)
 
     y_dists = list([np.zeros_like(rank) for _ in y_distance_functions])
     x_dists = list([np.zeros_like(rank) for _ in x_distance_functions])
@@ -301,35 +458,21 @@ def orderMO(
     y,
     x_distance_metrics=None,
     y_distance_metrics=None,
+    rank=None,
+    max_memory=None,
 ):
     """Returns the ordering for a non-dominated sort for multi-objective optimization
     x: input parameter matrix
     y: output objectives matrix
+    rank: optional precomputed non-dominated ranks of y
+    max_memory: optional upper bound in bytes on the memory used for ranking
     """
-    y_distance_functions = []
-    if y_distance_metrics is not None:
-        assert len(y_distance_metrics) > 0
-        for distance_metric in y_distance_metrics:
-            if callable(distance_metric):
-                y_distance_functions.append(distance_metric)
-            elif distance_metric == "crowding":
-                y_distance_functions.append(crowding_distance)
-            elif distance_metric == "euclidean":
-                y_distance_functions.append(euclidean_distance)
-            elif callable(distance_metric):
-                y_distance_functions.append(distance_metric)
-            else:
-                raise RuntimeError(f"sortMO: unknown distance metric {distance_metric}")
-
-    x_distance_functions = []
-    if x_distance_metrics is not None:
-        for distance_metric in x_distance_metrics:
-            if callable(distance_metric):
-                x_distance_functions.append(distance_metric)
-            else:
-                raise RuntimeError(f"sortMO: unknown distance metric {distance_metric}")
+    x_distance_functions, y_distance_functions = distance_functions(
+        x_distance_metrics, y_distance_metrics
+    )
 
-    rank = dda_non_dominated_sort(y)
+    if rank is None:
+        rank = dda_non_dominated_sort(y, max_memory=max_memory)
 
     y_dists = list([np.zeros_like(rank) for _ in y_distance_functions])
     x_dists = list([np.zeros_like(rank) for _ in x_distance_functions])
@@ -392,26 +535,74 @@ def crowding_distance(Y):
 
         U = (Y - lb) / ub_minus_lb
 
-        D = np.zeros(n)
-        DS = np.zeros((n, d))
-
         idx = U.argsort(axis=0)
-        US = np.zeros((n, d))
-        for i in range(d):
-            US[:, i] = U[idx[:, i], i]
+        US = np.take_along_axis(U, idx, axis=0)
 
-        DS[0, :] = 1.0
-        DS[n - 1, :] = 1.0
+        DS = np.ones((n, d))
+        DS[1 : n - 1, :] = US[2:, :] - US[: n - 2, :]
 
-        for i in range(1, n - 1):
-            for j in range(d):
-                DS[i, j] = US[i + 1, j] - US[i - 1, j]
+        D = crowding_sum(idx, DS)
+
+    return D
 
-        for i in range(n):
-            for j in range(d):
-                D[idx[i, j]] += DS[i, j]
-        D[np.isnan(D)] = 0.0
 
+def crowding_sum(idx, DS):
+    """Sums the per-dimension crowding distances DS of the points in
+    sorted order idx. The contributions of each point are added in the
+    order of their sorted positions, so that the result is identical to
+    sequential accumulation over the sorted positions."""
+    n, d = idx.shape
+    pos = np.empty_like(idx)
+    np.put_along_axis(pos, idx, np.arange(n)[:, None], axis=0)
+    C = np.empty((n, d))
+    np.put_along_axis(C, idx, DS, axis=0)
+    order = np.argsort(pos, axis=1, kind="stable")
+    C = np.take_along_axis(C, order, axis=1)
+    D = np.zeros(n)
+    for j in range(d):
+        D += C[:, j]
+    D[np.isnan(D)] = 0.0
+    return D
+
+
+def crowding_distance_fronts(Y, labels):
+    """Crowding distance computed separately within each group of points
+    with the same label (e.g. non-dominated rank), in one call.
+    Y: output data matrix [n,d]
+    labels: integer group label of each point
+    """
+    n, d = Y.shape
+    D = np.zeros(n)
+    if n == 0:
+        return D
+    labels = np.asarray(labels)
+    group_order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[group_order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    group = np.repeat(np.arange(len(starts)), sizes)
+
+    YS = Y[group_order]
+    lb = np.minimum.reduceat(YS, starts, axis=0)
+    ub = np.maximum.reduceat(YS, starts, axis=0)
+    ub_minus_lb = ub - lb
+    ub_minus_lb[ub_minus_lb == 0.0] = 1.0
+    U = (YS - lb[group]) / ub_minus_lb[group]
+
+    # sort each dimension within groups; group boundaries are the
+    # endpoints of each group
+    idx = np.column_stack([np.lexsort((U[:, j], group)) for j in range(d)])
+    US = np.take_along_axis(U, idx, axis=0)
+    is_end = np.zeros(n, dtype=bool)
+    is_end[starts] = True
+    is_end[starts + sizes - 1] = True
+    DS = np.ones((n, d))
+    inner = np.flatnonzero(~is_end)
+    DS[inner, :] = US[inner + 1, :] - US[inner - 1, :]
+
+    DG = crowding_sum(idx, DS)
+    DG[np.repeat(sizes == 1, sizes)] = 1.0
+    D[group_order] = DG
     return D
 
 
@@ -436,15 +627,28 @@ def tournament_prob(ax, i):
     return (ax[0], p)
 
 
+@lru_cache(maxsize=16)
+def _tournament_prob(pop, p=0.5):
+    """normalized geometric selection probabilities p * (1 - p)^i of the
+    candidates i = 0, ..., pop - 1 in sorted order, as accumulated by
+    tournament_prob; the returned array is read-only and cached by
+    population size
+    """
+    with np.errstate(under="ignore"):
+        prob = p * (1.0 - p) ** np.arange(pop)
+    prob = prob / np.sum(prob)
+    prob.flags.writeable = False
+    return prob
+
+
 def tournament_selection(local_random, pop, poolsize, *metrics):
     """tournament selecting the best individuals into the mating pool"""
 
     candidates = np.arange(pop)
     sorted_candidates = np.lexsort(tuple((metric[candidates] for metric in metrics)))
-    prob, _ = reduce(tournament_prob, candidates, ([], 0.5))
-    prob = prob / np.sum(prob)
+    prob = _tournament_prob(int(pop))
     poolidx = local_random.choice(
-        sorted_candidates, size=poolsize, p=np.asarray(prob), replace=False
+        sorted_candidates, size=poolsize, p=prob, replace=False
     )
     return poolidx
 
@@ -455,30 +659,120 @@ def remove_worst(
     pop,
     x_distance_metrics=None,
     y_distance_metrics=None,
+    rank=None,
 ):
-    """remove the worst individuals in the population"""
-    population_parm, population_obj, rank, _ = sortMO(
-        population_parm,
-        population_obj,
-        x_distance_metrics=x_distance_metrics,
-        y_distance_metrics=y_distance_metrics,
-    )
-    return population_parm[0:pop, :], population_obj[0:pop, :], rank[0:pop]
+    """remove the worst individuals in the population
+    rank: optional precomputed non-dominated ranks of population_obj
+
+    Only the fronts needed to fill pop individuals are ranked. The
+    fronts that fit entirely are kept as they are, and the distance
+    metrics are evaluated only on the front that is split by the
+    truncation, whose survivors are chosen by partial selection. The
+    returned individuals are ordered by rank, and the survivors of the
+    split front by decreasing distance.
+    """
+    n = population_obj.shape[0]
+    if rank is None:
+        rank = dda_non_dominated_sort(population_obj, max_count=pop)
+
+    counts = np.cumsum(np.bincount(rank[rank != UNRANKED]))
+    last_rank = np.searchsorted(counts, min(pop, n))
+    kept = np.flatnonzero(rank < last_rank)
+    kept = kept[np.argsort(rank[kept], kind="stable")]
+    front = np.flatnonzero(rank == last_rank)
+    k = min(pop, n) - len(kept)
+
+    if 0 < k < len(front):
+        x_distance_functions, y_distance_functions = distance_functions(
+            x_distance_metrics, y_distance_metrics
+        )
+        dists = [f(population_obj[front]) for f in y_distance_functions[::-1]]
+        dists += [f(population_parm[front]) for f in x_distance_functions[::-1]]
+        # same priority as the lexsort keys of sortMO, with ties broken
+        # by position as in a stable sort
+        keys = np.empty(
+            len(front),
+            dtype=[(f"d{i}", float) for i in range(len(dists))] + [("index", int)],
+        )
+        for i, dist in enumerate(dists):
+            keys[f"d{i}"] = -np.asarray(dist, dtype=float)
+        keys["index"] = np.arange(len(front))
+        order = list(keys.dtype.names)
+        survivors = np.argpartition(keys, k - 1, order=order)[:k]
+        survivors = survivors[np.argsort(keys[survivors], order=order)]
+        front = front[survivors]
+    else:
+        front = front[:k]
+
+    perm = np.concatenate((kept, front))
+    return population_parm[perm, :], population_obj[perm, :], rank[perm]
 
 
 def get_duplicates(X, Y=None, eps=1e-16):
+    """Returns a boolean mask of the rows of X that are within euclidean
+    distance eps of a row of Y with a lower index (Y defaults to X, in
+    which case the first of each group of duplicates is kept). Rows with
+    non-finite values are never duplicates.
+
+    Exact duplicates are collapsed first and the remaining distinct rows
+    are matched with KD-trees, so memory scales with the number of rows
+    and near-duplicate pairs rather than with len(X) x len(Y).
+    """
     if Y is None:
         Y = X
-    D = cdist(X, Y)
-    D[np.triu_indices(len(X), m=len(Y))] = np.inf
-    D[np.isnan(D)] = np.inf
 
     is_duplicate = np.zeros((len(X),), dtype=bool)
-    is_duplicate[np.any(D <= eps, axis=1)] = True
+    x_valid = np.flatnonzero(np.all(np.isfinite(X), axis=1))
+    y_valid = np.flatnonzero(np.all(np.isfinite(Y), axis=1))
+    if len(x_valid) == 0 or len(y_valid) == 0:
+        return is_duplicate
+
+    X_unique, x_inverse = np.unique(X[x_valid], axis=0, return_inverse=True)
+    Y_unique, y_first = np.unique(Y[y_valid], axis=0, return_index=True)
+    neighbors = cKDTree(Y_unique).query_ball_point(X_unique, eps)
+    n_neighbors = np.fromiter(map(len, neighbors), dtype=np.intp, count=len(neighbors))
+    near_i = np.repeat(np.arange(len(X_unique)), n_neighbors)
+    near_j = np.fromiter(
+        chain.from_iterable(neighbors), dtype=np.intp, count=np.sum(n_neighbors)
+    )
+    # lowest index in Y of a row within eps of each distinct row of X
+    min_index = np.full((len(X_unique),), np.iinfo(np.intp).max, dtype=np.intp)
+    np.minimum.at(min_index, near_i, y_valid[y_first][near_j])
+    is_duplicate[x_valid] = min_index[x_inverse.reshape(-1)] < x_valid
 
     return is_duplicate
 
 
+def merge_population(
+    population_parm,
+    population_obj,
+    rank,
+    x_gen,
+    y_gen,
+    incremental_sort=False,
+    eps=1e-16,
+):
+    """merge offspring into a ranked population and remove duplicate
+    individuals; returns the merged population and, if incremental_sort
+    is True, the non-dominated ranks of the merged population, which
+    are updated from the existing ranks by inserting the offspring
+    """
+    n = population_parm.shape[0]
+    population_parm = np.vstack((population_parm, x_gen))
+    population_obj = np.vstack((population_obj, y_gen))
+    is_duplicate = get_duplicates(population_parm, eps=eps)
+    merged_rank = None
+    if incremental_sort and (rank is not None) and not np.any(is_duplicate[:n]):
+        merged_rank = incremental_non_dominated_sort(
+            population_obj[:n], rank, population_obj[n:][~is_duplicate[n:]]
+        )
+    return (
+        population_parm[~is_duplicate, :],
+        population_obj[~is_duplicate, :],
+        merged_rank,
+    )
+
+
 def remove_duplicates(population_parm, population_obj, eps=1e-16):
     """remove duplicate individuals in the population"""
     is_duplicate = get_duplicates(population_parm, eps=eps)
@@ -6,12 +6,12 @@ from dmosopt.dda import dda_non_dominated_sort
 from dmosopt.MOEA import (
     Struct,
     MOEA,
-    crossover_sbx,
-    mutation,
+    generate_offspring,
     tournament_selection,
     sortMO,
     remove_worst,
     remove_duplicates,
+    merge_population,
 )
 from typing import Any, Union, Dict, List, Tuple, Optional
 
@@ -71,6 +71,7 @@ class NSGA2(MOEA):
             "nchildren": 1,
             "di_crossover": 1.0,
             "di_mutation": 20.0,
+            "incremental_sort": False,
         }
 
         return params
@@ -122,42 +123,19 @@ class NSGA2(MOEA):
 
         pool_idxs = tournament_selection(local_random, popsize, poolsize, rank)
         pool = population_parm[pool_idxs, :]
-        count = 0
-        xs_gen = []
-        while count < popsize - 1:
-            if local_random.random() < crossover_prob:
-                parentidx = local_random.choice(poolsize, 2, replace=False)
-                parent1 = pool[parentidx[0], :]
-                parent2 = pool[parentidx[1], :]
-                children1, children2 = crossover_sbx(
-                    local_random,
-                    parent1,
-                    parent2,
-                    di_crossover,
-                    xlb,
-                    xub,
-                    nchildren=nchildren,
-                )
-                child1 = children1[0]
-                child2 = children2[0]
-                xs_gen.extend([child1, child2])
-                count += 2
-            if local_random.random() < mutation_prob:
-                parentidx = local_random.integers(low=0, high=poolsize)
-                parent = pool[parentidx, :]
-                children = mutation(
-                    local_random,
-                    parent,
-                    di_mutation,
-                    xlb,
-                    xub,
-                    mutation_rate=mutation_rate,
-                    nchildren=nchildren,
-                )
-                child = children[0]
-                xs_gen.append(child)
-                count += 1
-        x_gen = np.vstack(xs_gen)
+        x_gen = generate_offspring(
+            local_random,
+            pool,
+            popsize - 1,
+            crossover_prob,
+            mutation_prob,
+            di_crossover,
+            di_mutation,
+            xlb,
+            xub,
+            mutation_rate=mutation_rate,
+            nchildren=nchildren,
+        )
         # gen_indexes = np.ones((x_gen.shape[0],), dtype=np.uint32) * self.state.gen_index
 
         return x_gen, {}
@@ -177,10 +155,13 @@ class NSGA2(MOEA):
         nInput = self.nInput
         nOutput = self.nOutput
 
-        population_parm = np.vstack((population_parm, x_gen))
-        population_obj = np.vstack((population_obj, y_gen))
-        population_parm, population_obj = remove_duplicates(
-            population_parm, population_obj
+        population_parm, population_obj, rank = merge_population(
+            population_parm,
+            population_obj,
+            rank,
+            x_gen,
+            y_gen,
+            incremental_sort=self.opt_params.incremental_sort,
         )
         population_parm, population_obj, rank = remove_worst(
             population_parm,
@@ -188,6 +169,7 @@ class NSGA2(MOEA):
             popsize,
             x_distance_metrics=self.x_distance_metrics,
             y_distance_metrics=self.y_distance_metrics,
+            rank=rank,
         )
 
         self.state.population_parm[:] = population_parm
@@ -7,11 +7,12 @@ from dmosopt.dda import dda_non_dominated_sort
 from dmosopt.MOEA import (
     Struct,
     MOEA,
-    mutation,
+    mutation_batch,
     sortMO,
-    crowding_distance,
+    crowding_distance_fronts,
     remove_worst,
     remove_duplicates,
+    merge_population,
 )
 from typing import Any, Union, Dict, List, Tuple, Optional
 
@@ -41,10 +42,6 @@ class SMPSO(MOEA):
             **kwargs,
         )
 
-        self.pop_slices = list(
-            [range(p * popsize, (p + 1) * popsize) for p in range(swarm_size)]
-        )
-
         self.model = model
         self.distance_metric = distance_metric
 
@@ -71,6 +68,7 @@ class SMPSO(MOEA):
             "nchildren": 1,
             "swarm_size": 5,
             "di_mutation": 20.0,
+            "incremental_sort": False,
         }
 
         return params
@@ -87,38 +85,34 @@ class SMPSO(MOEA):
         nOutput = self.nOutput
         popsize = self.popsize
         swarm_size = self.opt_params.swarm_size
-        pop_slices = self.pop_slices
 
         xlb = bounds[:, 0]
         xub = bounds[:, 1]
 
-        xs = []
-        ys = []
-        for sl in pop_slices:
-            x_s = x[sl].astype(np.float32)
-            y_s = y[sl].astype(np.float32)
-            xs.append(x_s)
-            ys.append(y_s)
+        # positions, objectives and velocities of all swarms are stacked
+        # into arrays of shape (swarm_size, popsize, ...)
+        n = swarm_size * popsize
+        xs = x[:n].astype(np.float32).reshape((swarm_size, popsize, nInput))
+        ys = y[:n].astype(np.float32).reshape((swarm_size, popsize, nOutput))
 
-        population_parm = np.zeros((swarm_size * popsize, nInput), dtype=np.float32)
-        population_obj = np.zeros((swarm_size * popsize, nOutput), dtype=np.float32)
+        population_parm = np.zeros((swarm_size, popsize, nInput), dtype=np.float32)
+        population_obj = np.zeros((swarm_size, popsize, nOutput), dtype=np.float32)
 
         velocity = (
-            local_random.uniform(size=(swarm_size * popsize, nInput)) * (xub - xlb)
-            + xlb
+            local_random.uniform(size=(swarm_size, popsize, nInput)) * (xub - xlb) + xlb
         )
 
-        ranks = []
-        for p, sl in enumerate(pop_slices):
-            xs[p], ys[p], rank_p, _ = sortMO(
+        ranks = np.zeros((swarm_size, popsize), dtype=np.intp)
+        for p in range(swarm_size):
+            x_p, y_p, rank_p, _ = sortMO(
                 xs[p],
                 ys[p],
                 x_distance_metrics=self.x_distance_metrics,
                 y_distance_metrics=self.y_distance_metrics,
             )
-            population_parm[sl] = xs[p][:popsize]
-            population_obj[sl] = ys[p][:popsize]
-            ranks.append(rank_p)
+            population_parm[p] = x_p
+            population_obj[p] = y_p
+            ranks[p] = rank_p
 
         state = Struct(
             bounds=bounds,
@@ -142,36 +136,30 @@ class SMPSO(MOEA):
         xub = self.state.bounds[:, 1]
 
         population_parm = self.state.population_parm
-        population_obj = self.state.population_obj
-        ranks = self.state.ranks
         velocity = self.state.velocity
 
-        pop_slices = self.pop_slices
-        xs_gens = [[] for _ in range(swarm_size)]
-        count = 0
-
-        for p, sl in enumerate(pop_slices):
-            xs_updated = update_position(population_parm[sl], velocity[sl], xlb, xub)
-            xs_gens[p].append(xs_updated)
-
-        while count < popsize:
-            parentidx = local_random.integers(low=0, high=popsize, size=(swarm_size, 1))
-            for p, sl in enumerate(pop_slices):
-                parent = population_parm[sl][parentidx[p, 0], :]
-                children = mutation(
-                    local_random,
-                    parent,
-                    di_mutation,
-                    xlb,
-                    xub,
-                    mutation_rate=mutation_rate,
-                    nchildren=nchildren,
-                )
-                child = children[0]
-                xs_gens[p].append(child)
-            count += 1
-
-        x_gen = np.vstack([np.vstack(x) for x in xs_gens]).astype(np.float32)
+        xs_updated = update_position(population_parm, velocity, xlb, xub)
+
+        # popsize mutated particles per swarm, nchildren per parent
+        nparents = -(-popsize // nchildren)
+        parentidx = local_random.integers(
+            low=0, high=popsize, size=(swarm_size, nparents)
+        )
+        parents = np.take_along_axis(population_parm, parentidx[:, :, None], axis=1)
+        children = mutation_batch(
+            local_random,
+            parents.reshape((swarm_size * nparents, -1)),
+            di_mutation,
+            xlb,
+            xub,
+            mutation_rate=mutation_rate,
+            nchildren=nchildren,
+        ).reshape((swarm_size, nparents * nchildren, -1))[:, :popsize]
+
+        # each swarm contributes its updated positions followed by its
+        # mutated particles
+        x_gen = np.concatenate((xs_updated, children), axis=1)
+        x_gen = x_gen.reshape((-1, self.nInput)).astype(np.float32)
         return x_gen, {}
 
     def update_strategy(
@@ -196,26 +184,36 @@ class SMPSO(MOEA):
         nInput = self.nInput
         nOutput = self.nOutput
 
-        pop_slices = self.pop_slices
-
-        for sl in pop_slices:
-            D = crowding_distance(y_gen[sl])
-            velocity[sl] = velocity_vector(
-                local_random, population_parm[sl], velocity[sl], x_gen[sl], D, xlb, xub
-            )
+        # x_gen holds the offspring of each swarm as one block of rows, its
+        # updated positions followed by its mutated particles
+        archive_x = x_gen.reshape((swarm_size, -1, nInput))
+        archive_y = y_gen.reshape((swarm_size, -1, nOutput))
+        n_archive = archive_x.shape[1]
+
+        swarm_labels = np.repeat(np.arange(swarm_size), n_archive)
+        D = crowding_distance_fronts(
+            archive_y.reshape((-1, nOutput)), swarm_labels
+        ).reshape((swarm_size, n_archive))
+        velocity[:] = velocity_vector(
+            local_random, population_parm, velocity, archive_x, D, xlb, xub
+        )
 
-        for p, sl in enumerate(pop_slices):
-            population_parm_p = np.vstack((population_parm[sl], x_gen[sl]))
-            population_obj_p = np.vstack((population_obj[sl], y_gen[sl]))
-            population_parm_p, population_obj_p = remove_duplicates(
-                population_parm_p, population_obj_p
+        for p in range(swarm_size):
+            population_parm_p, population_obj_p, rank_p = merge_population(
+                population_parm[p],
+                population_obj[p],
+                ranks[p],
+                archive_x[p],
+                archive_y[p],
+                incremental_sort=self.opt_params.incremental_sort,
             )
-            population_parm[sl], population_obj[sl], ranks[p] = remove_worst(
+            population_parm[p], population_obj[p], ranks[p] = remove_worst(
                 population_parm_p,
                 population_obj_p,
                 popsize,
                 x_distance_metrics=self.x_distance_metrics,
                 y_distance_metrics=self.y_distance_metrics,
+                rank=rank_p,
             )
 
     def get_population_strategy(self):
@@ -223,8 +221,8 @@ class SMPSO(MOEA):
         nInput = self.nInput
         nOutput = self.nOutput
 
-        pop_parm = self.state.population_parm.copy()
-        pop_obj = self.state.population_obj.copy()
+        pop_parm = self.state.population_parm.reshape((-1, nInput)).copy()
+        pop_obj = self.state.population_obj.reshape((-1, nOutput)).copy()
 
         pop_parm, pop_obj = remove_duplicates(pop_parm, pop_obj)
         bestx, besty, _ = remove_worst(
@@ -244,35 +242,37 @@ def update_position(parameters, velocity, xlb, xub):
 
 
 def velocity_vector(local_random, position, velocity, archive, crowding, xlb, xub):
-    r1 = local_random.uniform(low=0.0, high=1.0, size=1)[0]
-    r2 = local_random.uniform(low=0.0, high=1.0, size=1)[0]
-    w = local_random.uniform(low=0.1, high=0.5, size=1)[0]
-    c1 = local_random.uniform(low=1.5, high=2.5, size=1)[0]
-    c2 = local_random.uniform(low=1.5, high=2.5, size=1)[0]
-    phi = 0
-    if c1 + c2 > 4:
-        phi = c1 + c2
-    else:
-        phi = 0
+    """Constrained velocity update of all swarms.
+    position, velocity: arrays of shape (swarm_size, popsize, nInput)
+    archive: leader candidates of each swarm, (swarm_size, n_archive, nInput)
+    crowding: crowding distance of the leader candidates, (swarm_size, n_archive)
+    """
+    swarm_size = position.shape[0]
+    r1 = local_random.uniform(low=0.0, high=1.0, size=swarm_size)
+    r2 = local_random.uniform(low=0.0, high=1.0, size=swarm_size)
+    w = local_random.uniform(low=0.1, high=0.5, size=swarm_size)
+    c1 = local_random.uniform(low=1.5, high=2.5, size=swarm_size)
+    c2 = local_random.uniform(low=1.5, high=2.5, size=swarm_size)
+    phi = np.where(c1 + c2 > 4, c1 + c2, 0.0)
     chi = 2 / (2 - phi - ((phi**2) - 4 * phi) ** (1 / 2))
 
-    output = np.zeros((position.shape[0], velocity.shape[1]))
-    delta = [(xub[i] - xlb[i]) / 2 for i in range(0, len(xlb))]
-    if archive.shape[0] > 2:
-        ind_1, ind_2 = local_random.integers(low=0, high=archive.shape[0], size=2)
-        if crowding[ind_1] < crowding[ind_2]:
-            ind_1, ind_2 = ind_2, ind_1
+    delta = (xub - xlb) / 2
+    if archive.shape[1] > 2:
+        ind = local_random.integers(low=0, high=archive.shape[1], size=(swarm_size, 2))
+        # the less crowded candidate is the first leader
+        swap = np.take_along_axis(crowding, ind[:, :1], axis=1) < np.take_along_axis(
+            crowding, ind[:, 1:], axis=1
+        )
+        ind = np.where(swap, ind[:, ::-1], ind)
     else:
-        ind_1 = 0
-        ind_2 = 0
-
-    for i in range(0, velocity.shape[0]):
-        for j in range(0, velocity.shape[1]):
-            output[i, j] = (
-                w * velocity[i, j]
-                + c1 * r1 * (archive[ind_1, j] - position[i, j])
-                + c2 * r2 * (archive[ind_2, j] - position[i, j])
-            ) * chi
-            output[i, j] = np.clip(output[i, j], -delta[j], delta[j])
-
-    return output
+        ind = np.zeros((swarm_size, 2), dtype=int)
+    leaders = np.take_along_axis(archive, ind[:, :, None], axis=1)
+
+    r1, r2, w, c1, c2, chi = (v[:, None, None] for v in (r1, r2, w, c1, c2, chi))
+    output = (
+        w * velocity
+        + c1 * r1 * (leaders[:, :1, :] - position)
+        + c2 * r2 * (leaders[:, 1:, :] - position)
+    ) * chi
+
+    return np.clip(output, -delta, delta)
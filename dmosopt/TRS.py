@@ -1,11 +1,10 @@
 # Trust Region Search, multi-objective local optimization algorithm.
 
 import gc, itertools, math
-from functools import partial
 import numpy as np
 from numpy.random import default_rng
 from dmosopt.datatypes import OptHistory
-from dmosopt.dda import dda_non_dominated_sort
+from dmosopt.dda import dda_non_dominated_sort, incremental_non_dominated_sort
 from dmosopt.MOEA import (
     Struct,
     MOEA,
@@ -14,7 +13,7 @@ from dmosopt.MOEA import (
     remove_duplicates,
 )
 from dmosopt.sampling import sobol
-from dmosopt.indicators import Hypervolume
+from dmosopt.indicators import Hypervolume, MonteCarloHypervolume
 from typing import Any, Union, Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
@@ -62,12 +61,17 @@ class TRS(MOEA):
         if self.model.feasibility is not None:
             self.x_distance_metrics = [self.model.feasibility.rank]
         self.indicator = Hypervolume
+        if self.opt_params.approx_hypervolume:
+            self.indicator = MonteCarloHypervolume
 
     @property
     def default_parameters(self) -> Dict[str, Any]:
         """Returns default parameters of TRS strategy."""
         params = {
             "nchildren": 1,
+            "incremental_sort": False,
+            "approx_hypervolume": False,
+            "hypervolume_rel_tol": 0.01,
         }
 
         return params
@@ -80,7 +84,7 @@ class TRS(MOEA):
         local_random: Optional[np.random.Generator] = None,
         **params,
     ):
-        order, rank = orderMO(x, y, x_distance_metrics=self.x_distance_metrics)
+        order, rank, _ = orderMO(x, y, x_distance_metrics=self.x_distance_metrics)
         population_parm = x[order][: self.popsize]
         population_obj = y[order][: self.popsize]
         rank = rank[: self.popsize]
@@ -171,8 +175,13 @@ class TRS(MOEA):
             )
         )
 
-        population_parm, population_obj = self.update_state(
-            candidates_x, candidates_y, candidates_offspring
+        candidates_rank = None
+        if self.opt_params.incremental_sort:
+            merged_rank = incremental_non_dominated_sort(population_obj, rank, y_gen)
+            candidates_rank = np.concatenate((merged_rank[P:], merged_rank[:P]))
+
+        population_parm, population_obj, rank = self.update_state(
+            candidates_x, candidates_y, candidates_offspring, rank=candidates_rank
         )
         if self.state.tr.restart:
             self.restart_state()
@@ -187,21 +196,17 @@ class TRS(MOEA):
 
         return pop_x, pop_y
 
-    def select_candidates(self, candidates_x, candidates_y):
+    def select_candidates(self, candidates_x, candidates_y, rank):
 
         popsize = self.popsize
 
         candidates_inds = np.asarray(range(candidates_x.shape[0]), dtype=np.int_)
 
         if candidates_x.shape[0] <= popsize:
-            return np.ones_like(candidates_inds, dtype=bool_), np.zeros_like(
+            return np.ones_like(candidates_inds, dtype=bool), np.zeros_like(
                 candidates_inds, dtype=bool
             )
 
-        order, rank = orderMO(
-            candidates_x, candidates_y, x_distance_metrics=self.x_distance_metrics
-        )
-
         chosen = np.zeros_like(candidates_inds, dtype=bool)
         not_chosen = np.zeros_like(candidates_inds, dtype=bool)
         mid_front = None
@@ -231,33 +236,32 @@ class TRS(MOEA):
             # reference point is chosen in the complete population
             # as the worst in each dimension +1
             ref = np.max(candidates_y, axis=0) + 1
-            indicator = self.indicator(ref_point=ref)
-
-            def contribution(front, i):
-                # The contribution of point p_i in point set P
-                # is the hypervolume of P without p_i
-                return indicator.do(
-                    np.concatenate(
-                        (candidates_y[front[:i]], candidates_y[front[i + 1 :]])
-                    )
-                )
-
-            contrib_values = np.fromiter(
-                map(partial(contribution, mid_front), range(len(mid_front))),
-                dtype=np.float32,
-            )
-            contrib_order = np.argsort(contrib_values)
+            indicator_params = {}
+            if self.opt_params.approx_hypervolume:
+                indicator_params = {
+                    "rel_tol": self.opt_params.hypervolume_rel_tol,
+                    "local_random": self.local_random,
+                }
+            indicator = self.indicator(ref_point=ref, **indicator_params)
+
+            # the points with the largest exclusive hypervolume
+            # contributions to the front are chosen first
+            contrib_values = indicator.contributions(candidates_y[mid_front])
+            contrib_order = np.argsort(-contrib_values, kind="stable")
 
             chosen[mid_front[contrib_order[:k]]] = True
             not_chosen[mid_front[contrib_order[k:]]] = True
 
         return chosen, not_chosen
 
-    def update_state(self, X_next, Y_next, is_offspring):
+    def update_state(self, X_next, Y_next, is_offspring, rank=None):
 
         state = self.state.tr
 
-        chosen, not_chosen = self.select_candidates(X_next, Y_next)
+        if rank is None:
+            rank = dda_non_dominated_sort(Y_next)
+
+        chosen, not_chosen = self.select_candidates(X_next, Y_next, rank)
 
         state.success_counter += np.count_nonzero(is_offspring[chosen])
 
@@ -274,7 +278,7 @@ class TRS(MOEA):
         if state.length < state.length_min:
             state.restart = True
 
-        return X_next[chosen], Y_next[chosen]
+        return X_next[chosen], Y_next[chosen], rank[chosen]
 
     def restart_state(self):
         if self.state.tr.length_init > 4 * self.state.tr.length_min:
@@ -29,6 +29,7 @@ default_optimizers = {
 
 default_surrogate_methods = {
     "gpr": "dmosopt.model.GPR_Matern",
+    "sgpr": "dmosopt.model.SGPR_Matern",
     "egp": "dmosopt.model.EGP_Matern",
     "megp": "dmosopt.model.MEGP_Matern",
     "mdgp": "dmosopt.model.MDGP_Matern",
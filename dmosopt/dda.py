@@ -6,9 +6,53 @@
 # IEEE Transactions on Evolutionary Computation, vol. 21, no. 1, pp. 34-51, Feb. 2017
 # doi: 10.1109/TEVC.2016.2567648.
 #
+# The comparison and dominance degree matrices are computed with NumPy
+# broadcasting over blocks of rows (tiles), so that the temporaries
+# never exceed tile_size x N elements per objective.
+#
 
+from bisect import bisect_left, bisect_right
 import numpy as np
 
+# Default number of rows of the dominance degree matrix computed at once
+DEFAULT_TILE_SIZE = 512
+
+# Default upper bound in bytes on the memory used for ranking; larger
+# problems are ranked in row blocks without storing an N x N matrix
+DEFAULT_MAX_MEMORY = 1 << 30
+
+# Rank of the solutions that are not ranked by a partial sort
+UNRANKED = np.iinfo(np.int32).max
+
+
+def comparison_keys(y):
+    """Computes integer comparison keys for input vector y, such that
+    key[i] <= key[j] if and only if element (i, j) of the comparison
+    matrix of y is 1. Each key is the position in sorted order of the
+    first element of the group of equal values that y[i] belongs to.
+    y: input vector (N,)
+    """
+    (n,) = y.shape
+    # Sort y in ascending order
+    si = np.argsort(y)
+    ys = y[si]
+    group_start = np.ones((n,), dtype=bool)
+    group_start[1:] = ys[1:] != ys[:-1]
+    starts = np.where(group_start, np.arange(n, dtype=np.intp), 0)
+    np.maximum.accumulate(starts, out=starts)
+    keys = np.empty((n,), dtype=np.intp)
+    keys[si] = starts
+    return keys
+
+
+def objective_keys(Y):
+    """Comparison keys for each column of input matrix Y (N, D)."""
+    n, d = Y.shape
+    K = np.empty((n, d), dtype=np.intp)
+    for i in range(d):
+        K[:, i] = comparison_keys(Y[:, i])
+    return K
+
 
 def comparison_matrix(y, output=None):
     """Constructs comparison matrix for input vector y
@@ -16,80 +60,469 @@ def comparison_matrix(y, output=None):
     output: optional output matrix argument of dimension (N, N)
     """
     (n,) = y.shape
-    # Sort y in ascending order
-    si = np.argsort(y)
+    keys = comparison_keys(y)
     if output is None:
         output = np.zeros((n, n), dtype=np.intp)
+    np.less_equal(keys[:, None], keys[None, :], out=output, casting="unsafe")
+
+    return output
+
+
+def degree_dtype(d):
+    """Smallest unsigned integer type that can hold dominance degrees
+    for d objectives."""
+    if d < (1 << 8):
+        return np.uint8
+    elif d < (1 << 16):
+        return np.uint16
     else:
-        output.fill(0)
-    for j in range(n):
-        output[si[0], j] = 1
-    for i in range(1, n):
-        if y[si[i]] == y[si[i - 1]]:
-            for j in range(n):
-                output[si[i], j] = output[si[i - 1], j]
-        else:
-            for j in range(i, n):
-                output[si[i], si[j]] = 1
+        return np.uint32
 
+
+def dominance_degree_tile(K, rows, cols=slice(None), output=None, dtype=np.intp):
+    """Computes the rows of the dominance degree matrix selected by
+    rows (a slice or index array), restricted to the columns selected
+    by cols, from the objective comparison keys K (N, D)."""
+    n, d = K.shape
+    K_rows = K[rows]
+    K_cols = K[cols]
+    if output is None:
+        output = np.zeros((K_rows.shape[0], K_cols.shape[0]), dtype=dtype)
+    else:
+        output.fill(0)
+    for i in range(d):
+        output += K_rows[:, i, None] <= K_cols[None, :, i]
     return output
 
 
-def dominance_degree_matrix(Y):
+def dominance_degree_matrix(Y, tile_size=None, dtype=np.intp):
+    """Constructs the dominance degree matrix of input matrix Y (N, D).
+    tile_size: number of rows computed per block
+    dtype: integer type of the matrix elements; degree_dtype(D) gives
+    the most compact type
+    """
     n, d = Y.shape
+    if tile_size is None:
+        tile_size = DEFAULT_TILE_SIZE
+    tile_size = max(int(tile_size), 1)
+
+    K = objective_keys(Y)
+    D = np.zeros((n, n), dtype=dtype)
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        dominance_degree_tile(K, slice(start, stop), output=D[start:stop])
+
+    return D
 
-    D = np.zeros((n, n), dtype=np.intp)
-    Cy = np.zeros((n, n), dtype=np.intp)
 
+def dominance_tile(K, rows, cols=slice(None)):
+    """Boolean matrix M where M[i, j] is True if the solution with
+    comparison keys K[rows][i] dominates the solution with keys
+    K[cols][j], i.e. the dominance degree D[i, j] is d and the
+    objective vectors are not identical.
+    """
+    n, d = K.shape
+    K_rows = K[rows]
+    K_cols = K[cols]
+    weakly_dominates = np.ones((K_rows.shape[0], K_cols.shape[0]), dtype=bool)
+    identical = np.ones((K_rows.shape[0], K_cols.shape[0]), dtype=bool)
     for i in range(d):
-        comparison_matrix(Y[:, i], output=Cy)
-        D = D + Cy
+        weakly_dominates &= K_rows[:, i, None] <= K_cols[None, :, i]
+        identical &= K_rows[:, i, None] == K_cols[None, :, i]
+    return np.logical_and(weakly_dominates, ~identical, out=weakly_dominates)
 
-    return D
+
+def dominance_matrix(Y, tile_size=None):
+    """Boolean matrix M (N, N) where M[i, j] is True if Y[i] dominates
+    Y[j]. This is the dominance degree matrix D after steps 1 and 2 of
+    the DDA algorithm, thresholded at D[i, j] == d.
+    """
+    n, d = Y.shape
+    if tile_size is None:
+        tile_size = DEFAULT_TILE_SIZE
+    tile_size = max(int(tile_size), 1)
+
+    K = objective_keys(Y)
+    M = np.empty((n, n), dtype=bool)
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        M[start:stop] = dominance_tile(K, slice(start, stop))
+
+    return M
+
+
+def assign_fronts(M, max_count=None):
+    """Assigns solutions to fronts given a boolean dominance matrix M.
+    If max_count is given, fronts are assigned only until at least
+    max_count solutions are ranked, and the remaining solutions are
+    given rank UNRANKED.
+    """
+    (n, _) = M.shape
+    if max_count is None:
+        max_count = n
+    rank = np.full((n,), UNRANKED, dtype=np.intp)
+    if n == 0:
+        return rank
+    n_dominators = np.count_nonzero(M, axis=0)
+    remaining = np.ones((n,), dtype=bool)
+    count = 0
+    k = 0  # the first front
+    while count < min(n, max_count):
+        Q = np.flatnonzero(remaining & (n_dominators == 0))
+        rank[Q] = k
+        remaining[Q] = False
+        count += len(Q)
+        n_dominators -= np.count_nonzero(M[Q], axis=0)
+        k += 1
+
+    return rank
+
+
+def unique_objective_keys(Y):
+    """Comparison keys of the distinct objective vectors of Y (N, D),
+    in lexicographic order, and the index of the distinct vector for
+    each row of Y. Identical objective vectors do not dominate each
+    other and therefore always share the same rank.
+    """
+    K = objective_keys(Y)
+    K_unique, inverse = np.unique(K, axis=0, return_inverse=True)
+    return K_unique, inverse.reshape((-1,))
+
+
+def non_dominated_sort_2d(Y):
+    """Sweep-line non-dominated sort for two objectives, O(N log N).
+    Solutions are visited in lexicographic order, so that all
+    potential dominators of a solution have been ranked before it. For
+    each front, the minimum of the second objective among its members
+    is maintained; these minima are non-decreasing with the front
+    index, and the rank of a solution is the first front whose minimum
+    is greater than its second objective.
+    y: input matrix (N, 2)
+    """
+    K, inverse = unique_objective_keys(Y)
+    m = K.shape[0]
+    rank = np.zeros((m,), dtype=np.intp)
+    front_min = []
+    for i, y2 in enumerate(K[:, 1].tolist()):
+        k = bisect_right(front_min, y2)
+        if k == len(front_min):
+            front_min.append(y2)
+        else:
+            front_min[k] = y2
+        rank[i] = k
+
+    return rank[inverse]
 
 
-def dda_non_dominated_sort(Y, return_dom=False):
+def non_dominated_sort_3d(Y):
+    """Non-dominated sort for three objectives.
+    Solutions are visited in lexicographic order, so that a solution
+    is dominated by a previously ranked solution if and only if it is
+    dominated in the projection onto the second and third
+    objectives. For each front, the non-dominated staircase of its
+    projection is kept in sorted order and queried by bisection. Since
+    a solution dominated by front k + 1 is also dominated by front k,
+    the rank of a solution is found by binary search over the fronts,
+    with O(log^2 N) comparisons. The staircases are Python lists, so
+    that replacing a run of staircase points shifts the rest of the
+    list; the sort is O(N^2) in the worst case, but these shifts are
+    memory moves that are small in practice compared to the N^2 D
+    work of the dominance degree matrix.
+    y: input matrix (N, 3)
+    """
+    K, inverse = unique_objective_keys(Y)
+    m = K.shape[0]
+    rank = np.zeros((m,), dtype=np.intp)
+    # Staircases: second objective in ascending order, third
+    # objective in strictly descending order
+    front_y2 = []
+    front_y3 = []
+
+    def is_dominated(k, y2, y3):
+        i = bisect_right(front_y2[k], y2) - 1
+        return i >= 0 and front_y3[k][i] <= y3
+
+    for i, (y2, y3) in enumerate(K[:, 1:].tolist()):
+        lo, hi = 0, len(front_y2)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if is_dominated(mid, y2, y3):
+                lo = mid + 1
+            else:
+                hi = mid
+        k = lo
+        if k == len(front_y2):
+            front_y2.append([y2])
+            front_y3.append([y3])
+        else:
+            s2 = front_y2[k]
+            s3 = front_y3[k]
+            # Remove the staircase points dominated by the new point
+            j = bisect_left(s2, y2)
+            l = j
+            while l < len(s3) and s3[l] >= y3:
+                l += 1
+            s2[j:l] = [y2]
+            s3[j:l] = [y3]
+        rank[i] = k
+
+    return rank[inverse]
+
+
+def block_size(n, d, max_memory):
+    """Number of rows of the dominance degree matrix that can be
+    computed at once by blocked_non_dominated_sort within max_memory
+    bytes."""
+    itemsize = np.dtype(degree_dtype(d)).itemsize
+    # Two degree tiles and up to four boolean temporaries per row
+    bytes_per_row = max(n * (2 * itemsize + 4), 1)
+    return max(int(max_memory // bytes_per_row), 1)
+
+
+def blocked_non_dominated_sort(Y, max_memory=None, max_count=None):
+    """Rank objectives by Dominance Degree Matrix without storing an
+    N x N matrix. The dominance degrees are computed in blocks of rows
+    with the most compact integer type for the number of objectives,
+    and the number of dominators of each solution is accumulated over
+    the blocks. Each front is then removed by recomputing the rows of
+    its members, so that every row is computed twice in total.
+
+    y: input matrix (N, D)
+    max_memory: upper bound in bytes on the size of the temporary
+    arrays, excluding O(N x D) arrays
+    max_count: if given, fronts are assigned only until at least
+    max_count solutions are ranked (see assign_fronts)
+    """
+    n, d = Y.shape
+    if max_memory is None:
+        max_memory = DEFAULT_MAX_MEMORY
+    dtype = degree_dtype(d)
+    block = block_size(n, d, max_memory)
+
+    K = objective_keys(Y)
+
+    def count_dominated(rows):
+        counts = np.zeros((n,), dtype=np.intp)
+        for start in range(0, len(rows), block):
+            block_rows = rows[start : start + block]
+            D = dominance_degree_tile(K, block_rows, dtype=dtype)
+            # D[j, i] for j in block_rows
+            D_t = np.zeros_like(D)
+            for i in range(d):
+                D_t += K[block_rows, i, None] >= K[None, :, i]
+            # Solutions with identical objective vectors do not dominate
+            # each other
+            counts += np.count_nonzero((D == d) & (D_t != d), axis=0)
+        return counts
+
+    if max_count is None:
+        max_count = n
+    rank = np.full((n,), UNRANKED, dtype=np.intp)
+    n_dominators = count_dominated(np.arange(n))
+    remaining = np.ones((n,), dtype=bool)
+    count = 0
+    k = 0
+    while count < min(n, max_count):
+        Q = np.flatnonzero(remaining & (n_dominators == 0))
+        rank[Q] = k
+        remaining[Q] = False
+        count += len(Q)
+        n_dominators -= count_dominated(Q)
+        k += 1
+
+    return rank
+
+
+def non_dominated_front(Y, block_size=None):
+    """Returns the indices, in ascending order, of the solutions of the
+    first front (rank 0) of input matrix Y (N, D), without ranking the
+    remaining solutions.
+
+    The solutions are scanned in lexicographic order of their
+    objectives, in which a solution can only be dominated by solutions
+    that precede it. Each block of solutions is filtered against the
+    front found so far and then against itself, so the cost is
+    proportional to N times the size of the first front.
+
+    y: input matrix (N, D)
+    block_size: number of solutions filtered at once
+    """
+    n, d = Y.shape
+    if block_size is None:
+        block_size = DEFAULT_TILE_SIZE
+    block_size = max(int(block_size), 1)
+    if n == 0:
+        return np.zeros((0,), dtype=np.intp)
+
+    K = objective_keys(Y)
+    order = np.lexsort(K.T[::-1])
+
+    if d == 2:
+        # In lexicographic order, a solution is dominated if and only
+        # if a preceding solution with a different objective vector has
+        # a smaller or equal second objective.
+        Ks = K[order]
+        new_vector = np.ones((n,), dtype=bool)
+        new_vector[1:] = np.any(Ks[1:] != Ks[:-1], axis=1)
+        group = np.cumsum(new_vector) - 1
+        y2 = Ks[new_vector, 1]
+        prev_min = np.minimum.accumulate(
+            np.concatenate(([np.iinfo(np.intp).max], y2[:-1]))
+        )
+        is_front = (y2 < prev_min)[group]
+        return np.sort(order[is_front])
+
+    front = np.zeros((0,), dtype=np.intp)
+    for start in range(0, n, block_size):
+        block = order[start : start + block_size]
+        dominated = np.zeros((len(block),), dtype=bool)
+        for front_start in range(0, len(front), block_size):
+            dominated |= np.any(
+                dominance_tile(K, front[front_start : front_start + block_size], block),
+                axis=0,
+            )
+        block = block[~dominated]
+        block = block[~np.any(dominance_tile(K, block, block), axis=0)]
+        front = np.concatenate((front, block))
+
+    return np.sort(front)
+
+
+def truncate_ranks(rank, max_count):
+    """Sets the ranks of the fronts that are not needed to cover
+    max_count solutions to UNRANKED."""
+    if max_count is None or max_count >= len(rank):
+        return rank
+    counts = np.cumsum(np.bincount(rank))
+    last_rank = np.searchsorted(counts, max(max_count, 1))
+    rank[rank > last_rank] = UNRANKED
+    return rank
+
+
+def dda_non_dominated_sort(
+    Y, return_dom=False, tile_size=None, max_memory=None, max_count=None
+):
     """Rank objectives by Dominance Degree Matrix.
     y: input matrix (N, D)
+    tile_size: number of rows of the dominance degree matrix that are
+    computed at once; bounds the size of temporary arrays to
+    tile_size x N elements.
+    max_memory: upper bound in bytes on the memory used for ranking
+    (default DEFAULT_MAX_MEMORY). If the N x N dominance matrix does
+    not fit, the ranks are computed by blocked_non_dominated_sort.
+    Does not apply if return_dom is True.
+    max_count: if given, fronts are assigned only until at least
+    max_count solutions are ranked, and the remaining solutions are
+    given rank UNRANKED.
+
+    For two and three objectives, the ranks are computed by the
+    equivalent O(N log N) sorting methods non_dominated_sort_2d and
+    non_dominated_sort_3d, unless the dominance degree matrix is
+    requested.
     """
     n, d = Y.shape
 
+    if not return_dom and n > 0:
+        if d == 2:
+            return truncate_ranks(non_dominated_sort_2d(Y), max_count)
+        elif d == 3:
+            return truncate_ranks(non_dominated_sort_3d(Y), max_count)
+
+        if max_memory is None:
+            max_memory = DEFAULT_MAX_MEMORY
+        if tile_size is None:
+            tile_size = DEFAULT_TILE_SIZE
+        if n * (n + 3 * min(tile_size, n)) > max_memory:
+            return blocked_non_dominated_sort(
+                Y, max_memory=max_memory, max_count=max_count
+            )
+
     # 1. Construct the dominance degree matrix of set Y
-    D = dominance_degree_matrix(Y)
     DM = None
     if return_dom:
-        DM = np.copy(D)
+        DM = dominance_degree_matrix(Y, tile_size=tile_size)
 
     # 2. For the solutions with identical objective vectors, set the
     # corresponding elements of D to zero
-    for i in range(n):
-        for j in range(i, n):
-            if (D[i, j] == d) and (D[j, i] == d):
-                D[i, j] = 0
-                D[j, i] = 0
+    M = dominance_matrix(Y, tile_size=tile_size)
 
     # 3. Assign the solutions Yi to a number of fronts
-    count = 0
-    k = 0  # the first front
-    rank = np.zeros((n,), dtype=np.intp)
-    while True:
-        Q = []
-        maxD = np.max(D, axis=0)
-        for i in range(n):
-            if maxD[i] < d and maxD[i] >= 0:
-                # solution Yi belongs to current front
-                Q.append(i)
-                count += 1
-        for i in Q:
-            D[i, :] = -1
-            D[:, i] = -1
-
-        rank[np.asarray(Q, dtype=np.intp)] = k
-        k += 1
-        if count == n:
-            break
+    rank = assign_fronts(M, max_count=max_count)
 
     if return_dom:
         return rank, DM
     else:
         return rank
+
+
+def incremental_non_dominated_sort(Y, rank, Y_new, tile_size=None):
+    """Updates the non-dominated ranks of a ranked set after inserting
+    new points. Only the dominance relations between the new points
+    and the rest of the set, and between the solutions that are
+    dominated by the new points, are computed.
+
+    Y: input matrix (N, D) of already ranked solutions
+    rank: ranks of Y (N,), as returned by dda_non_dominated_sort
+    Y_new: input matrix (K, D) of new solutions
+    tile_size: number of rows of dominance relations computed at once
+
+    Returns the ranks (N + K,) of np.vstack((Y, Y_new)), which are
+    identical to the ranks returned by dda_non_dominated_sort for the
+    stacked matrix.
+    """
+    n, d = Y.shape
+    k = Y_new.shape[0]
+    if tile_size is None:
+        tile_size = DEFAULT_TILE_SIZE
+    tile_size = max(int(tile_size), 1)
+
+    rank = np.asarray(rank, dtype=np.intp)
+    new_rank = np.concatenate((rank, np.zeros((k,), dtype=np.intp)))
+    if k == 0:
+        return new_rank
+
+    K = objective_keys(np.vstack((Y, Y_new)))
+
+    # 1. Dominance relations between the new points and the old
+    # solutions. Only old solutions dominated by a new point can change
+    # rank, since dominance is transitive.
+    affected = np.zeros((n,), dtype=bool)
+    new_lb = np.zeros((k,), dtype=np.intp)
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        M_old_new = dominance_tile(K, slice(start, stop), slice(n, None))
+        new_lb = np.maximum(
+            new_lb,
+            np.max(np.where(M_old_new, rank[start:stop, None] + 1, 0), axis=0),
+        )
+    for start in range(n, n + k, tile_size):
+        stop = min(start + tile_size, n + k)
+        M_new_old = dominance_tile(K, slice(start, stop), slice(0, n))
+        affected |= np.any(M_new_old, axis=0)
+
+    # 2. The rank of a solution is one more than the maximum rank of
+    # its dominators. Dominators that are not in S have unchanged
+    # ranks, which are bounded by the previous ranks of the affected
+    # solutions and accounted for in the lower bounds of the new
+    # points. The remaining ranks are obtained by peeling the
+    # dominance relations within S in topological order.
+    S = np.concatenate((np.flatnonzero(affected), np.arange(n, n + k)))
+    rank_S = np.concatenate((rank[affected], new_lb))
+    M_S = np.empty((len(S), len(S)), dtype=bool)
+    for start in range(0, len(S), tile_size):
+        stop = min(start + tile_size, len(S))
+        M_S[start:stop] = dominance_tile(K, S[start:stop], S)
+
+    n_dominators = np.count_nonzero(M_S, axis=0)
+    remaining = np.ones((len(S),), dtype=bool)
+    while np.any(remaining):
+        Q = np.flatnonzero(remaining & (n_dominators == 0))
+        remaining[Q] = False
+        rank_S = np.maximum(
+            rank_S, np.max(np.where(M_S[Q], rank_S[Q, None] + 1, 0), axis=0)
+        )
+        n_dominators -= np.count_nonzero(M_S[Q], axis=0)
+
+    new_rank[S] = rank_S
+
+    return new_rank
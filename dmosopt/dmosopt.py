@@ -20,6 +20,7 @@ from dmosopt.datatypes import (
     StrategyState,
 )
 from dmosopt.termination import MultiObjectiveStdTermination
+from dmosopt.indicators import HypervolumeArchive
 
 logger = logging.getLogger("dmosopt")
 
@@ -56,6 +57,8 @@ class DistOptStrategy:
         },
         surrogate_custom_training: Optional[str] = None,
         surrogate_custom_training_kwargs: Optional[Dict] = None,
+        surrogate_warm_start: bool = False,
+        surrogate_refit_interval: Optional[int] = None,
         sensitivity_method_name: Optional[str] = None,
         sensitivity_method_kwargs={},
         distance_metric=None,
@@ -67,6 +70,8 @@ class DistOptStrategy:
         feasibility_method_name=None,
         feasibility_method_kwargs={},
         termination_conditions=None,
+        sort_max_memory=None,
+        hypervolume_ref_point=None,
         local_random=None,
         logger=None,
         file_path=None,
@@ -74,6 +79,9 @@ class DistOptStrategy:
         if local_random is None:
             local_random = default_rng()
         self.local_random = local_random
+        self.sort_max_memory = sort_max_memory
+        self.hypervolume_ref_point = hypervolume_ref_point
+        self.hv_archive = None
         self.logger = logger
         self.file_path = file_path
         self.feasibility_method_name = feasibility_method_name
@@ -82,6 +90,12 @@ class DistOptStrategy:
         self.surrogate_method_name = surrogate_method_name
         self.surrogate_custom_training = surrogate_custom_training
         self.surrogate_custom_training_kwargs = surrogate_custom_training_kwargs
+        self.surrogate_warm_start = surrogate_warm_start
+        self.surrogate_hyperparameters = None
+        self.surrogate_refit_interval = surrogate_refit_interval
+        self.surrogate = None
+        self.surrogate_updates = 0
+        self.surrogate_pending = []
         self.sensitivity_method_kwargs = sensitivity_method_kwargs
         self.sensitivity_method_name = sensitivity_method_name
         self.optimizer_name = (
@@ -211,7 +225,7 @@ class DistOptStrategy:
 
         self._remove_duplicate_evals()
 
-        perm, _, _ = MOEA.orderMO(self.x, self.y)
+        perm, _, _ = MOEA.orderMO(self.x, self.y, max_memory=self.sort_max_memory)
 
         self.x = self.x[perm[0 : self.population_size], :]
         self.y = self.y[perm[0 : self.population_size], :]
@@ -264,6 +278,10 @@ class DistOptStrategy:
                 if self.prob.n_constraints is not None:
                     self.c = np.vstack((self.c, c_completed))
 
+            self._update_hypervolume(y_completed, c_completed)
+            if self.surrogate is not None:
+                self.surrogate_pending.append((x_completed, y_completed, c_completed))
+
             t_completed = np.vstack([x.time for x in self.completed])
             if self.t is None:
                 self.t = t_completed
@@ -299,6 +317,28 @@ class DistOptStrategy:
 
         return result
 
+    def _update_hypervolume(self, y_completed, c_completed):
+        """Adds the feasible completed evaluations to the hypervolume
+        archive. The archive is created with the first evaluations and
+        includes any evaluations given as initial data."""
+        if self.hv_archive is None:
+            y_completed, c_completed = self.y, self.c
+            ref_point = self.hypervolume_ref_point
+            if ref_point is None:
+                # the worst initial value in each objective, extended by
+                # a tenth of the initial range
+                y_finite = y_completed[np.all(np.isfinite(y_completed), axis=1)]
+                if len(y_finite) == 0:
+                    return
+                y_max = np.max(y_finite, axis=0)
+                y_range = y_max - np.min(y_finite, axis=0)
+                ref_point = y_max + 0.1 * np.where(y_range > 0.0, y_range, 1.0)
+            self.hv_archive = HypervolumeArchive(ref_point)
+
+        if c_completed is not None:
+            y_completed = y_completed[np.all(c_completed > 0.0, axis=1)]
+        self.stats["hypervolume"] = self.hv_archive.add(y_completed)
+
     def initialize_epoch(self, epoch_index):
         assert (
             self.opt_gen == None
@@ -315,6 +355,27 @@ class DistOptStrategy:
 
         completed_evals = self._update_evals()
 
+        # between refits, the surrogate of the previous epoch is updated
+        # with the evaluations completed since it was fitted
+        surrogate, surrogate_update = None, None
+        if (
+            self.surrogate is not None
+            and self.surrogate_updates + 1 < self.surrogate_refit_interval
+        ):
+            surrogate = self.surrogate
+            if len(self.surrogate_pending) > 0:
+                x_new, y_new, c_new = zip(*self.surrogate_pending)
+                surrogate_update = (
+                    np.vstack(x_new),
+                    np.vstack(y_new),
+                    None if c_new[0] is None else np.vstack(c_new),
+                )
+            self.surrogate_updates += 1
+        else:
+            self.surrogate_updates = 0
+        self.surrogate = None
+        self.surrogate_pending = []
+
         assert epoch_index > self.epoch_index
         self.epoch_index = epoch_index
         self.opt_gen = opt.epoch(
@@ -334,6 +395,9 @@ class DistOptStrategy:
             surrogate_method_kwargs=self.surrogate_method_kwargs,
             surrogate_custom_training=self.surrogate_custom_training,
             surrogate_custom_training_kwargs=self.surrogate_custom_training_kwargs,
+            surrogate_hyperparameters=self.surrogate_hyperparameters,
+            surrogate=surrogate,
+            surrogate_update=surrogate_update,
             sensitivity_method_name=self.sensitivity_method_name,
             sensitivity_method_kwargs=self.sensitivity_method_kwargs,
             feasibility_method_name=self.feasibility_method_name,
@@ -387,6 +451,12 @@ class DistOptStrategy:
                 result_dict = ex.args[0]
 
                 self.stats.update(result_dict.get("stats", {}))
+                if self.surrogate_warm_start:
+                    self.surrogate_hyperparameters = result_dict.get(
+                        "surrogate_hyperparameters", None
+                    )
+                if self.surrogate_refit_interval is not None:
+                    self.surrogate = result_dict.get("surrogate", None)
 
                 if "best_x" in result_dict:
                     best_x = result_dict["best_x"]
@@ -447,6 +517,12 @@ class DistOptStrategy:
                 result_dict = ex.args[0]
 
                 self.stats.update(result_dict.get("stats", {}))
+                if self.surrogate_warm_start:
+                    self.surrogate_hyperparameters = result_dict.get(
+                        "surrogate_hyperparameters", None
+                    )
+                if self.surrogate_refit_interval is not None:
+                    self.surrogate = result_dict.get("surrogate", None)
 
                 x_resample = None
                 y_pred = None
@@ -508,6 +584,7 @@ class DistOptStrategy:
                 self.prob.dim,
                 self.prob.n_objectives,
                 feasible=feasible,
+                max_memory=self.sort_max_memory,
             )
             return bestx, besty, bestf, bestc
         else:
@@ -574,6 +651,8 @@ class DistOptimizer:
         surrogate_method_kwargs={"anisotropic": False, "optimizer": "sceua"},
         surrogate_custom_training=None,
         surrogate_custom_training_kwargs=None,
+        surrogate_warm_start=False,
+        surrogate_refit_interval=None,
         optimizer_name="nsga2",
         optimizer_kwargs={
             "mutation_prob": 0.1,
@@ -586,6 +665,8 @@ class DistOptimizer:
         feasibility_method_name=None,
         feasibility_method_kwargs=None,
         termination_conditions=None,
+        sort_max_memory=None,
+        hypervolume_ref_point=None,
         controller: Optional[distwq.MPIController] = None,
         **kwargs,
     ) -> None:
@@ -617,6 +698,16 @@ class DistOptimizer:
         :param int save_eval: (optional) How often to save progress.
         :param str file_path: (optional) File name for restoring and/or saving results and settings.
         :param bool save: (optional) Save settings and progress periodically.
+        :param int sort_max_memory: (optional) Upper bound in bytes on the memory used
+        for non-dominated sorting of the evaluation archive.
+        :param array hypervolume_ref_point: (optional) Reference point for the
+        hypervolume of the evaluation archive that is recorded in the
+        optimizer stats; derived from the initial evaluations by default.
+        :param bool surrogate_warm_start: (optional) Start the surrogate fit of
+        each epoch from the hyperparameters fitted in the previous epoch.
+        :param int surrogate_refit_interval: (optional) Number of epochs between
+        hyperparameter refits of the surrogate. In the epochs in between, the
+        surrogate is updated with the new evaluations, if it supports updates.
         """
 
         if (random_seed is not None) and (local_random is not None):
@@ -641,6 +732,8 @@ class DistOptimizer:
         self.surrogate_method_kwargs = surrogate_method_kwargs
         self.surrogate_custom_training = surrogate_custom_training
         self.surrogate_custom_training_kwargs = surrogate_custom_training_kwargs
+        self.surrogate_warm_start = surrogate_warm_start
+        self.surrogate_refit_interval = surrogate_refit_interval
         self.sensitivity_method_name = sensitivity_method_name
         self.sensitivity_method_kwargs = sensitivity_method_kwargs
         self.optimizer_name = (
@@ -658,6 +751,8 @@ class DistOptimizer:
         self.feasibility_method_name = feasibility_method_name
         self.feasibility_method_kwargs = feasibility_method_kwargs
         self.termination_conditions = termination_conditions
+        self.sort_max_memory = sort_max_memory
+        self.hypervolume_ref_point = hypervolume_ref_point
         self.metadata = metadata
         self.local_random = local_random
         self.random_seed = random_seed
@@ -927,6 +1022,8 @@ class DistOptimizer:
                 surrogate_method_kwargs=self.surrogate_method_kwargs,
                 surrogate_custom_training=self.surrogate_custom_training,
                 surrogate_custom_training_kwargs=self.surrogate_custom_training_kwargs,
+                surrogate_warm_start=self.surrogate_warm_start,
+                surrogate_refit_interval=self.surrogate_refit_interval,
                 sensitivity_method_name=self.sensitivity_method_name,
                 sensitivity_method_kwargs=self.sensitivity_method_kwargs,
                 optimizer_name=self.optimizer_name,
@@ -934,6 +1031,8 @@ class DistOptimizer:
                 feasibility_method_name=self.feasibility_method_name,
                 feasibility_method_kwargs=self.feasibility_method_kwargs,
                 termination_conditions=self.termination_conditions,
+                sort_max_memory=self.sort_max_memory,
+                hypervolume_ref_point=self.hypervolume_ref_point,
                 local_random=self.local_random,
                 logger=self.logger,
                 file_path=self.file_path,
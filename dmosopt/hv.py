@@ -17,6 +17,9 @@
 
 __author__ = "Simon Wessing"
 
+from bisect import bisect_left
+import numpy as np
+
 
 class HyperVolume:
     """
@@ -277,6 +280,80 @@ class MultiList:
                 bounds[i] = node.cargo[i]
 
 
+def hypervolume_2d(front, referencePoint):
+    """Exact hypervolume of a set of points in two objectives, by sorting
+    the points and summing the areas of the resulting staircase
+    (O(n log n)). Dominated points and points outside the reference box
+    are allowed.
+    """
+    front = np.asarray(front, dtype=float).reshape((-1, 2))
+    referencePoint = np.asarray(referencePoint, dtype=float)
+    front = front[np.all(front < referencePoint, axis=1)]
+    if len(front) == 0:
+        return 0.0
+    order = np.lexsort((front[:, 1], front[:, 0]))
+    f1 = front[order, 0]
+    f2 = front[order, 1]
+    nd = f2 < np.minimum.accumulate(np.concatenate(([np.inf], f2[:-1])))
+    f1 = f1[nd]
+    f2 = f2[nd]
+    widths = np.append(f1[1:], referencePoint[0]) - f1
+    return float(np.sum(widths * (referencePoint[1] - f2)))
+
+
+def hypervolume_3d(front, referencePoint):
+    """Exact hypervolume of a set of points in three objectives, by
+    sweeping along the third objective and maintaining the area of the
+    two-dimensional staircase of the points swept so far in sorted lists.
+    Each point is located by bisection and inserted and removed at most
+    once, but list insertion and deletion shift the tail of the
+    staircase, so the sweep is O(n^2) in the worst case (O(n log n) if
+    the staircase stays short). Dominated points and points outside the
+    reference box are allowed.
+    """
+    front = np.asarray(front, dtype=float).reshape((-1, 3))
+    referencePoint = np.asarray(referencePoint, dtype=float)
+    front = front[np.all(front < referencePoint, axis=1)]
+    if len(front) == 0:
+        return 0.0
+    front = front[np.argsort(front[:, 2], kind="stable")]
+    ref_x, ref_y, ref_z = (float(v) for v in referencePoint)
+
+    # staircase sorted by increasing x and decreasing y
+    xs = []
+    ys = []
+    area = 0.0
+    volume = 0.0
+    n = len(front)
+    for k in range(n):
+        x, y, z = (float(v) for v in front[k])
+        i = bisect_left(xs, x)
+        # skip points dominated by the staircase (including duplicates)
+        dominated = (i > 0 and ys[i - 1] <= y) or (
+            i < len(xs) and xs[i] == x and ys[i] <= y
+        )
+        if not dominated:
+            upper_y = ys[i - 1] if i > 0 else ref_y
+            # remove the points dominated by (x, y) and add the area
+            # between their staircase and y
+            left = x
+            j = i
+            while j < len(xs) and ys[j] >= y:
+                area += (xs[j] - left) * (upper_y - y)
+                left = xs[j]
+                upper_y = ys[j]
+                j += 1
+            right = xs[j] if j < len(xs) else ref_x
+            area += (right - left) * (upper_y - y)
+            del xs[i:j]
+            del ys[i:j]
+            xs.insert(i, x)
+            ys.insert(i, y)
+        z_next = float(front[k + 1, 2]) if k + 1 < n else ref_z
+        volume += area * (z_next - z)
+    return volume
+
+
 if __name__ == "__main__":
     # Example:
     referencePoint = [2, 2, 2]
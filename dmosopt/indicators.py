@@ -6,8 +6,9 @@ from abc import abstractmethod
 
 import numpy as np
 from dmosopt.normalization import PreNormalization
-from dmosopt.hv import HyperVolume as _HyperVolume
-from dmosopt.dda import dda_non_dominated_sort
+from dmosopt.hv import HyperVolume as _HyperVolume, hypervolume_2d, hypervolume_3d
+from dmosopt.dda import non_dominated_front
+from dmosopt.sampling import sobol
 
 
 def euclidean_distance(a, b, norm=None):
@@ -74,6 +75,120 @@ def derive_ideal_and_nadir_from_pf(pf, ideal=None, nadir=None):
     return ideal, nadir
 
 
+def hypervolume_contributions(F, ref_point):
+    """Exclusive hypervolume contribution of each point in F, i.e. the
+    hypervolume of F minus the hypervolume of F without the point, with
+    respect to the reference point ref_point (minimization).
+
+    Two objectives are handled in closed form on the sorted points, and
+    three objectives by sweeping along the last objective and
+    accumulating the 2-dimensional contributions of the points below
+    each slab. In more dimensions, each contribution is computed from
+    the hypervolume of the other points limited to the box of the point.
+    """
+    F = np.asarray(F, dtype=float)
+    ref_point = np.asarray(ref_point, dtype=float)
+    n, d = F.shape
+    contrib = np.zeros(n)
+
+    # points outside the reference box neither contribute nor affect
+    # the contributions of other points
+    inside = np.flatnonzero(np.all(F < ref_point, axis=1))
+    if len(inside) == 0:
+        return contrib
+    contrib[inside] = _contributions(F[inside], ref_point)
+
+    return contrib
+
+
+def _hypervolume(F, ref_point):
+    """Hypervolume of F with respect to ref_point. The recursive
+    algorithm used beyond three objectives requires F to be a set of
+    distinct non-dominated points."""
+    d = F.shape[1]
+    if d == 2:
+        return hypervolume_2d(F, ref_point)
+    elif d == 3:
+        return hypervolume_3d(F, ref_point)
+    else:
+        hv = _HyperVolume(ref_point)
+        return hv.compute(F)
+
+
+def _contributions(F, ref_point):
+    """Exclusive contributions of points that all lie inside the
+    reference box."""
+    n, d = F.shape
+    if d == 1:
+        contrib = np.zeros(n)
+        order = np.argsort(F[:, 0], kind="stable")
+        upper = ref_point[0] if n == 1 else F[order[1], 0]
+        contrib[order[0]] = upper - F[order[0], 0]
+        return contrib
+    elif d == 2:
+        return _contributions_2d(F, ref_point)
+
+    elif d == 3:
+        # dimension sweep along the last objective: between consecutive
+        # levels, the points below the slab contribute their exclusive
+        # 2-dimensional contributions times the slab height
+        contrib = np.zeros(n)
+        order = np.argsort(F[:, -1], kind="stable")
+        levels = np.append(F[order, -1], ref_point[-1])
+        for k in range(n):
+            height = levels[k + 1] - levels[k]
+            if height > 0.0:
+                active = order[: k + 1]
+                contrib[active] += (
+                    _contributions_2d(F[active, :-1], ref_point[:-1]) * height
+                )
+        return contrib
+
+    # in more dimensions, the contribution of p is the volume of its box
+    # less the hypervolume of the other points limited to the box, of
+    # which usually only few remain non-dominated
+    contrib = np.zeros(n)
+    hv = _HyperVolume(ref_point)
+    for i in range(n):
+        Q = np.maximum(np.delete(F, i, axis=0), F[i])
+        Q = np.unique(Q[np.all(Q < ref_point, axis=1)], axis=0)
+        covered = 0.0
+        if len(Q) > 0:
+            covered = hv.compute(Q[non_dominated_front(Q)])
+        contrib[i] = np.prod(ref_point - F[i]) - covered
+    return contrib
+
+
+def _contributions_2d(F, ref_point):
+    """Exclusive contributions in two objectives. Each non-dominated
+    point p exclusively dominates the box between p and its neighbors on
+    the front, less the part of the box covered by the points that only
+    p dominates."""
+    n = F.shape[0]
+    contrib = np.zeros(n)
+    order = np.lexsort((F[:, 1], F[:, 0]))
+    f1 = F[order, 0]
+    f2 = F[order, 1]
+
+    nd = f2 < np.minimum.accumulate(np.concatenate(([np.inf], f2[:-1])))
+    idx = np.flatnonzero(nd)
+    upper1 = np.append(f1[idx[1:]], ref_point[0])
+    upper2 = np.insert(f2[idx[:-1]], 0, ref_point[1])
+    values = (upper1 - f1[idx]) * (upper2 - f2[idx])
+
+    # each dominated point lies in the box of the closest non-dominated
+    # point that precedes it in sorted order
+    dominated = np.flatnonzero(~nd)
+    if len(dominated) > 0:
+        box = np.searchsorted(idx, dominated, side="right") - 1
+        for j in np.unique(box):
+            Q = np.column_stack((f1, f2))[dominated[box == j]]
+            values[j] -= hypervolume_2d(Q, (upper1[j], upper2[j]))
+
+    contrib[order[idx]] = values
+    return contrib
+
+
 class Indicator(PreNormalization):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -176,13 +291,147 @@ class Hypervolume(Indicator):
             self.ref_point is not None
         ), "For Hypervolume a reference point needs to be provided!"
 
+    def contributions(self, F):
+        """Exclusive hypervolume contribution of each point in F"""
+        if F.ndim == 1:
+            F = F[None, :]
+        F = self.normalization.forward(F)
+        return hypervolume_contributions(F, self.ref_point)
+
     def _do(self, F):
         if self.nds:
-            rank = dda_non_dominated_sort(F)
-            non_dom = np.argwhere(rank == 0).ravel()
+            non_dom = non_dominated_front(F)
             F = np.copy(F[non_dom, :])
 
-        hv = _HyperVolume(self.ref_point)
-        val = hv.compute(F)
+        return _hypervolume(F, self.ref_point)
+
+
+class MonteCarloHypervolume(Hypervolume):
+    def __init__(
+        self,
+        ref_point=None,
+        rel_tol=0.01,
+        max_samples=1 << 16,
+        batch_size=1024,
+        min_batches=4,
+        local_random=None,
+        **kwargs
+    ):
+        """Hypervolume estimated by randomized quasi-Monte Carlo sampling
+        of the box between the best point of the front and the reference
+        point. Every batch is an independently scrambled Sobol design, so
+        the spread of the batch estimates gives the standard error of
+        their mean.
+
+        rel_tol: target relative standard error of the estimate, or of
+        every exclusive contribution estimate
+        max_samples: sample budget, reached if rel_tol is not
+        batch_size: number of samples per batch
+        min_batches: minimum number of batches before testing rel_tol
+        local_random: random number generator used to scramble the designs
+        """
+        super().__init__(ref_point=ref_point, **kwargs)
+        assert (
+            rel_tol is not None or max_samples is not None
+        ), "Either a relative error or a sample budget needs to be provided!"
+        self.rel_tol = rel_tol
+        self.max_samples = max_samples
+        self.batch_size = batch_size
+        self.min_batches = max(min_batches, 2)
+        if local_random is None:
+            local_random = np.random.default_rng()
+        self.local_random = local_random
+
+    def contributions(self, F):
+        """Estimated exclusive hypervolume contribution of each point in F"""
+        if F.ndim == 1:
+            F = F[None, :]
+        F = self.normalization.forward(F)
+        contrib = np.zeros(F.shape[0])
+        inside = np.flatnonzero(np.all(F < self.ref_point, axis=1))
+        if len(inside) > 0:
+            contrib[inside] = self._estimate(F[inside], exclusive=True)
+        return contrib
+
+    def _do(self, F):
+        if self.nds:
+            non_dom = non_dominated_front(F)
+            F = np.copy(F[non_dom, :])
 
-        return val
+        F = F[np.all(F < self.ref_point, axis=1)]
+        if len(F) == 0:
+            return 0.0
+
+        return self._estimate(F)
+
+    def _estimate(self, F, exclusive=False):
+        """Estimates the hypervolume dominated by the points in F, or if
+        exclusive is True, the volume dominated by each point alone."""
+        n, d = F.shape
+        lower = np.min(F, axis=0)
+        width = self.ref_point - lower
+        volume = np.prod(width)
+
+        estimates = []
+        n_samples = 0
+        while True:
+            X = sobol(self.batch_size, d, local_random=self.local_random)
+            X = lower + width * X
+            dominated = np.ones((n, X.shape[0]), dtype=bool)
+            for k in range(d):
+                dominated &= F[:, k, None] <= X[None, :, k]
+            if exclusive:
+                hit = np.count_nonzero(dominated, axis=0) == 1
+                count = np.bincount(np.argmax(dominated[:, hit], axis=0), minlength=n)
+            else:
+                count = np.count_nonzero(np.any(dominated, axis=0))
+            estimates.append(volume * count / X.shape[0])
+            n_samples += X.shape[0]
+
+            if self.max_samples is not None and n_samples >= self.max_samples:
+                break
+            if self.rel_tol is not None and len(estimates) >= self.min_batches:
+                # each estimate, so also the smallest exclusive
+                # contribution, needs to reach the target relative error
+                values = np.reshape(estimates, (len(estimates), -1))
+                std_err = np.std(values, axis=0, ddof=1) / np.sqrt(len(values))
+                if np.all(std_err <= self.rel_tol * np.mean(values, axis=0)):
+                    break
+
+        return np.mean(estimates, axis=0)
+
+
+class HypervolumeArchive:
+    def __init__(self, ref_point):
+        """Non-dominated set of all points added so far, and its
+        hypervolume with respect to the fixed reference point ref_point.
+        Each new non-dominated point increases the hypervolume by its
+        exclusive contribution, which is the volume of its box less the
+        hypervolume of the archive limited to that box.
+        """
+        self.ref_point = np.asarray(ref_point, dtype=float)
+        self.front = np.empty((0, len(self.ref_point)))
+        self.hypervolume = 0.0
+
+    def add(self, F):
+        """Adds the points in F to the archive and returns the updated
+        hypervolume."""
+        F = at_least_2d_array(np.asarray(F, dtype=float), extend_as="row")
+        F = F[np.all(F < self.ref_point, axis=1)]
+        if len(F) == 0:
+            return self.hypervolume
+
+        F = np.unique(F[non_dominated_front(F)], axis=0)
+        for p in F:
+            if np.any(np.all(self.front <= p, axis=1)):
+                continue
+            Q = np.maximum(self.front, p)
+            Q = np.unique(Q[np.all(Q < self.ref_point, axis=1)], axis=0)
+            covered = 0.0
+            if len(Q) > 0:
+                covered = _hypervolume(Q[non_dominated_front(Q)], self.ref_point)
+            self.hypervolume += np.prod(self.ref_point - p) - covered
+            dominated = np.all(p <= self.front, axis=1)
+            self.front = np.vstack((self.front[~dominated], p))
+
+        return self.hypervolume
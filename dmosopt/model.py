@@ -1,17 +1,32 @@
 import gc
+import os
 import copy
+import multiprocessing
 import numpy as np
 from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.base import clone
 from sklearn.gaussian_process import GaussianProcessRegressor
-from sklearn.gaussian_process.kernels import RBF, Matern, ConstantKernel, WhiteKernel
+from sklearn.gaussian_process.kernels import (
+    RBF,
+    Matern,
+    ConstantKernel,
+    WhiteKernel,
+    Product,
+    Sum,
+)
 from scipy.cluster.vq import kmeans2
+from scipy.optimize import minimize
+from scipy.linalg import cholesky, cho_solve, solve_triangular
+from scipy.spatial.distance import cdist, pdist, squareform
 from dmosopt.MOEA import top_k_MO
+from dmosopt.sampling import sobol
 
 try:
     import gpflow
     import tensorflow as tf
     import tensorflow_probability as tfp
-    from gpflow.utilities import print_summary
+    from gpflow.utilities import print_summary, parameter_dict, multiple_assign
     from gpflow.models import VGP, GPR, SVGP
     from gpflow.optimizers import NaturalGradient
     from gpflow.optimizers.natgrad import XiSqrtMeanVar
@@ -601,6 +616,15 @@ def handle_zeros_in_scale(scale, copy=True, constant_mask=None):
         return scale
 
 
+def state_dict_matches(module, state):
+    """Whether state has the same entries, with the same shapes, as the
+    state dict of module, so that it can be loaded into module."""
+    current = module.state_dict()
+    return set(state) == set(current) and all(
+        tuple(state[k].shape) == tuple(v.shape) for k, v in current.items()
+    )
+
+
 class Model:
     def __init__(self, objective=None, feasibility=None, sensitivity=None):
         self.objective = objective
@@ -1511,6 +1535,9 @@ class EGP_Matern:
         batch_size=None,
         use_cuda=False,
         top_k=None,
+        initial_hyperparameters=None,
+        warm_start_n_iter=500,
+        warm_start_tol=0.05,
         logger=None,
     ):
         if not _has_gpytorch:
@@ -1533,6 +1560,11 @@ class EGP_Matern:
         self.logger = logger
 
         xin, yin = top_k_MO(xin, yin, top_k)
+        if (
+            initial_hyperparameters is not None
+            and len(initial_hyperparameters) != nOutput
+        ):
+            initial_hyperparameters = None
 
         n_devices = None
         if self.use_cuda:
@@ -1588,6 +1620,7 @@ class EGP_Matern:
             gp_noise_prior=None,
             checkpoint_size=None,
             preconditioner_size=None,
+            initial_state=None,
         ):
             gp_likelihood = gpytorch.likelihoods.GaussianLikelihood(
                 noise_prior=gp_noise_prior, batch_shape=batch_shape
@@ -1601,6 +1634,12 @@ class EGP_Matern:
                 lengthscale_bounds=gp_lengthscale_bounds,
                 batch_size=batch_size,
             )
+            if initial_state is not None:
+                # a state fitted with other dimensions or batch shape cannot
+                # be loaded, and the caller fits from scratch instead
+                if not state_dict_matches(gp_model, initial_state):
+                    return None
+                gp_model.load_state_dict(initial_state)
 
             if self.use_cuda:
                 train_x = train_x.cuda()
@@ -1667,6 +1706,8 @@ class EGP_Matern:
                             )
                             break
 
+            # final loss, i.e. the negative marginal log likelihood per point
+            gp_model.loss = loss_log[-1]
             return gp_model
 
         smlist = []
@@ -1709,6 +1750,41 @@ class EGP_Matern:
                     checkpoint_size=self.checkpoint_size,
                     preconditioner_size=self.preconditioner_size,
                 )
+            elif initial_hyperparameters is not None:
+                # warm start from the parameters of a previous fit with a
+                # reduced number of iterations, and refit from scratch if
+                # they do not fit the model or the likelihood has degraded
+                loss_prev = -initial_hyperparameters[i]["log_marginal_likelihood"]
+                gp_model = train(
+                    nInput,
+                    1,
+                    train_x,
+                    train_y,
+                    n_iter=warm_start_n_iter,
+                    gp_lengthscale_bounds=gp_lengthscale_bounds,
+                    gp_noise_prior=gp_noise_prior,
+                    initial_state=initial_hyperparameters[i]["state"],
+                )
+                refit_reason = None
+                if gp_model is None:
+                    refit_reason = "initial state does not match the model"
+                elif gp_model.loss > loss_prev + warm_start_tol * abs(loss_prev):
+                    refit_reason = "likelihood degraded"
+                if refit_reason is not None:
+                    if logger is not None:
+                        logger.info(
+                            f"EGP_Matern: {refit_reason} for output {i+1}, "
+                            "refitting..."
+                        )
+                    gp_model = train(
+                        nInput,
+                        1,
+                        train_x,
+                        train_y,
+                        n_iter=n_iter,
+                        gp_lengthscale_bounds=gp_lengthscale_bounds,
+                        gp_noise_prior=gp_noise_prior,
+                    )
             else:
                 gp_model = train(
                     nInput,
@@ -1775,6 +1851,20 @@ class EGP_Matern:
         mean, var = self.predict(x)
         return mean
 
+    def get_hyperparameters(self):
+        """Returns the fitted model parameters of each output and the
+        marginal log likelihood per training point, which can be passed
+        as initial_hyperparameters to warm-start a later fit."""
+        return [
+            {
+                "state": {
+                    k: v.detach().cpu().clone() for k, v in sm.state_dict().items()
+                },
+                "log_marginal_likelihood": -sm.loss,
+            }
+            for sm in self.smlist
+        ]
+
 
 class CRV_Matern:
     def __init__(
@@ -2410,6 +2500,9 @@ class SVGP_Matern:
         n_iter=30000,
         min_elbo_pct_change=1.0,
         top_k=None,
+        initial_hyperparameters=None,
+        warm_start_n_iter=3000,
+        warm_start_tol=0.05,
         logger=None,
     ):
         if not _has_gpflow:
@@ -2460,29 +2553,7 @@ class SVGP_Matern:
         natgrad_opt = NaturalGradient(gamma=natgrad_gamma)
         autotune = tf.data.experimental.AUTOTUNE
 
-        smlist = []
-        for i in range(nOutput):
-            if logger is not None:
-                logger.info(
-                    f"SVGP_Matern: creating regressor for output {i+1} of {nOutput}..."
-                )
-                logger.info(
-                    f"SVGP_Matern: y_{i} range is {(np.min(yin[:,i]), np.max( yin[:,i]))}..."
-                )
-
-            data = (
-                np.asarray(xn, dtype=np.float64),
-                yn[:, i].reshape((-1, 1)).astype(np.float64),
-            )
-
-            M = int(round(inducing_fraction * N))
-            # Z = tf.random.uniform((M, D))  # Initialize inducing locations to M random inputs
-            if M < min_inducing:
-                Z = xn.copy()
-            else:
-                Z = xn[
-                    np.random.choice(N, size=M, replace=False), :
-                ].copy()  # Initialize inducing locations to M random inputs
+        def train(data, Z, n_iter, initial_state=None):
             gp_kernel = gpflow.kernels.Matern52()
             gp_likelihood = gpflow.likelihoods.Gaussian(variance=gp_likelihood_sigma)
             gp_model = gpflow.models.SVGP(
@@ -2503,10 +2574,14 @@ class SVGP_Matern:
             gpflow.set_trainable(gp_model.q_sqrt, False)
             gpflow.set_trainable(gp_model.inducing_variable, False)
 
-            if logger is not None:
-                logger.info(
-                    f"SVGP_Matern: optimizing regressor for output {i+1} of {nOutput}..."
-                )
+            if initial_state is not None:
+                current = parameter_dict(gp_model)
+                if set(initial_state) != set(current) or any(
+                    np.shape(initial_state[k]) != tuple(v.shape)
+                    for k, v in current.items()
+                ):
+                    return None
+                multiple_assign(gp_model, initial_state)
 
             variational_params = [(gp_model.q_mu, gp_model.q_sqrt)]
 
@@ -2556,8 +2631,84 @@ class SVGP_Matern:
                         break
             print_summary(gp_model)
             # assert(opt_log.success)
+            # full-data ELBO per point, which unlike the minibatch
+            # estimates can be compared between fits
+            gp_model.elbo_per_point = gp_model.elbo(data).numpy() / N
+            return gp_model
+
+        smlist = []
+        hyperparameters = []
+        for i in range(nOutput):
+            if logger is not None:
+                logger.info(
+                    f"SVGP_Matern: creating regressor for output {i+1} of {nOutput}..."
+                )
+                logger.info(
+                    f"SVGP_Matern: y_{i} range is {(np.min(yin[:,i]), np.max( yin[:,i]))}..."
+                )
+
+            data = (
+                np.asarray(xn, dtype=np.float64),
+                yn[:, i].reshape((-1, 1)).astype(np.float64),
+            )
+
+            M = int(round(inducing_fraction * N))
+            # Z = tf.random.uniform((M, D))  # Initialize inducing locations to M random inputs
+            if M < min_inducing:
+                Z = xn.copy()
+            else:
+                Z = xn[
+                    np.random.choice(N, size=M, replace=False), :
+                ].copy()  # Initialize inducing locations to M random inputs
+
+            if logger is not None:
+                logger.info(
+                    f"SVGP_Matern: optimizing regressor for output {i+1} of {nOutput}..."
+                )
+
+            if initial_hyperparameters is not None:
+                # warm start from the kernel, likelihood, inducing points and
+                # q(u) of a previous fit with a reduced number of iterations;
+                # the previous inducing points are kept so that q(u) carries
+                # over, and the model is refit from scratch if the state does
+                # not fit the model or the likelihood has degraded
+                initial_state = initial_hyperparameters[i]["state"]
+                elbo_prev = initial_hyperparameters[i]["log_marginal_likelihood"]
+                Z_prev = np.asarray(initial_state.get(".inducing_variable.Z", Z))
+                gp_model = train(
+                    data,
+                    Z_prev if Z_prev.shape[1:] == (D,) else Z,
+                    warm_start_n_iter,
+                    initial_state=initial_state,
+                )
+                refit_reason = None
+                if gp_model is None:
+                    refit_reason = "initial state does not match the model"
+                elif gp_model.elbo_per_point < elbo_prev - warm_start_tol * abs(
+                    elbo_prev
+                ):
+                    refit_reason = "likelihood degraded"
+                if refit_reason is not None:
+                    if logger is not None:
+                        logger.info(
+                            f"SVGP_Matern: {refit_reason} for output {i+1}, "
+                            "refitting..."
+                        )
+                    gp_model = train(data, Z, n_iter)
+            else:
+                gp_model = train(data, Z, n_iter)
+
+            hyperparameters.append(
+                {
+                    "state": {
+                        k: v.numpy() for k, v in parameter_dict(gp_model).items()
+                    },
+                    "log_marginal_likelihood": gp_model.elbo_per_point,
+                }
+            )
             smlist.append(gp_model.posterior())
         self.smlist = smlist
+        self.hyperparameters = hyperparameters
 
     def predict(self, xin):
         x = np.zeros_like(xin, dtype=np.float64)
@@ -2593,6 +2744,18 @@ class SVGP_Matern:
         mean, var = self.predict(x)
         return mean
 
+    def get_hyperparameters(self):
+        """Returns the fitted model parameters of each output and the
+        ELBO per training point, which can be passed as
+        initial_hyperparameters to warm-start a later fit."""
+        return [
+            {
+                "state": {k: np.copy(v) for k, v in hp["state"].items()},
+                "log_marginal_likelihood": hp["log_marginal_likelihood"],
+            }
+            for hp in self.hyperparameters
+        ]
+
 
 class VGP_Matern:
     def __init__(
@@ -2767,6 +2930,130 @@ class VGP_Matern:
         return mean
 
 
+class KernelLikelihood:
+    def __init__(self, X, nu, anisotropic, alpha=1e-10):
+        """
+        Log-marginal likelihood of GP regression with the kernel
+        ConstantKernel * Matern + WhiteKernel, or with RBF in place of
+        Matern, as a function of the kernel parameters theta in the
+        order and log scale of the scikit-learn kernel. The pairwise
+        squared distances of the training inputs X, per dimension if
+        the length scales are anisotropic, are computed only once, so
+        each evaluation applies the kernel transform and a Cholesky
+        factorization.
+
+        nu: smoothness of the Matern kernel, 1.5, 2.5 or inf for RBF
+        anisotropic: whether there is one length scale per dimension
+        alpha: value added to the diagonal of the kernel matrix
+        """
+        self.nu = nu
+        self.alpha = alpha
+        if anisotropic:
+            self.D2 = np.stack([(X[:, [k]] - X[:, k]) ** 2 for k in range(X.shape[1])])
+        else:
+            self.D2 = squareform(pdist(X, metric="sqeuclidean"))[np.newaxis, :, :]
+
+    @classmethod
+    def supports(cls, kernel):
+        """Whether kernel has the structure handled by this class, with
+        no fixed parameters"""
+        return (
+            isinstance(kernel, Sum)
+            and isinstance(kernel.k1, Product)
+            and isinstance(kernel.k1.k1, ConstantKernel)
+            and isinstance(kernel.k1.k2, RBF)
+            and isinstance(kernel.k2, WhiteKernel)
+            and getattr(kernel.k1.k2, "nu", np.inf) in (1.5, 2.5, np.inf)
+            and not any(h.fixed for h in kernel.hyperparameters)
+        )
+
+    @classmethod
+    def from_kernel(cls, kernel, X, alpha=1e-10):
+        corr = kernel.k1.k2
+        return cls(X, getattr(corr, "nu", np.inf), corr.anisotropic, alpha=alpha)
+
+    def __call__(self, theta, y, eval_gradient=False):
+        params = np.exp(theta)
+        constant = params[0]
+        length_scale = params[1:-1]
+        noise = params[-1]
+
+        # scaled squared distances and correlations, and G = -dk/dr / r,
+        # from which the gradients with respect to the length scales follow
+        R2 = np.tensordot(1.0 / length_scale**2, self.D2, axes=1)
+        if self.nu == np.inf:
+            C = np.exp(-0.5 * R2)
+            G = C
+        else:
+            R = np.sqrt(5.0 * R2 if self.nu == 2.5 else 3.0 * R2)
+            E = np.exp(-R)
+            if self.nu == 2.5:
+                C = (1.0 + R + R**2 / 3.0) * E
+                G = 5.0 / 3.0 * (1.0 + R) * E
+            else:
+                C = (1.0 + R) * E
+                G = 3.0 * E
+
+        K = constant * C
+        K[np.diag_indices_from(K)] += noise + self.alpha
+        try:
+            L = cholesky(K, lower=True, check_finite=False)
+        except np.linalg.LinAlgError:
+            return (-np.inf, np.zeros_like(theta)) if eval_gradient else -np.inf
+
+        y = y[:, np.newaxis] if y.ndim == 1 else y
+        n, m = y.shape
+        alpha = cho_solve((L, True), y, check_finite=False)
+        lml = -0.5 * np.sum(y * alpha)
+        lml -= m * np.log(np.diag(L)).sum()
+        lml -= m * n / 2 * np.log(2 * np.pi)
+        if not eval_gradient:
+            return lml
+
+        # 0.5 * trace((alpha alpha^T - K^-1) dK / dtheta), summed over outputs
+        W = alpha @ alpha.T
+        W -= m * cho_solve((L, True), np.eye(n), check_finite=False)
+        WG = W * G
+        grad = np.empty_like(theta)
+        grad[0] = 0.5 * constant * np.sum(W * C)
+        grad[1:-1] = (
+            0.5 * constant * np.tensordot(self.D2, WG, axes=2) / length_scale**2
+        )
+        grad[-1] = 0.5 * noise * np.trace(W)
+        return lml, grad
+
+
+class DistanceCachedGPR(GaussianProcessRegressor):
+    """
+    GaussianProcessRegressor that evaluates the log-marginal likelihood
+    with KernelLikelihood when the kernel is supported, reusing the
+    distances of the training inputs across the evaluations of the
+    hyperparameter search. Other kernels use the scikit-learn evaluation.
+    """
+
+    def fit(self, X, y):
+        super().fit(X, y)
+        # the distances are only needed during the hyperparameter search
+        self._likelihood = None
+        return self
+
+    def log_marginal_likelihood(
+        self, theta=None, eval_gradient=False, clone_kernel=True
+    ):
+        if theta is None or not KernelLikelihood.supports(self.kernel_):
+            return super().log_marginal_likelihood(
+                theta, eval_gradient=eval_gradient, clone_kernel=clone_kernel
+            )
+        cached = getattr(self, "_likelihood", None)
+        if cached is None or cached[0] is not self.X_train_:
+            likelihood = KernelLikelihood.from_kernel(
+                self.kernel_, self.X_train_, alpha=self.alpha
+            )
+            self._likelihood = (self.X_train_, likelihood)
+        likelihood = self._likelihood[1]
+        return likelihood(np.asarray(theta), self.y_train_, eval_gradient)
+
+
 class GPR_Matern:
     def __init__(
         self,
@@ -2780,7 +3067,12 @@ class GPR_Matern:
         seed=None,
         length_scale_bounds=(1e-3, 100.0),
         anisotropic=False,
+        shared_kernel=False,
+        n_jobs=None,
+        initial_hyperparameters=None,
+        warm_start_tol=0.05,
         top_k=None,
+        pool=None,
         logger=None,
     ):
         self.nInput = nInput
@@ -2791,6 +3083,8 @@ class GPR_Matern:
         self.logger = logger
 
         xin, yin = top_k_MO(xin, yin, top_k)
+        # training inputs, which MOASMO.update checks for duplicates
+        self.xin = np.copy(xin)
 
         N = xin.shape[0]
         x = np.zeros_like(xin)
@@ -2806,9 +3100,27 @@ class GPR_Matern:
         kernel = ConstantKernel(1, (0.01, 100.0)) * Matern(
             length_scale=length_scale, length_scale_bounds=length_scale_bounds, nu=2.5
         ) + WhiteKernel(noise_level=1e-5, noise_level_bounds=(1e-8, 0.1))
+        # with a shared kernel, a single regressor is fitted to all outputs,
+        # so that the kernel matrix is factorized once for all of them
+        self.shared_kernel = shared_kernel
+        targets = self.targets(y)
+        # independent random streams for the optimizer of each regressor
+        seeds = np.random.SeedSequence(seed).spawn(len(targets))
+        # the batched and multi-start optimizers evaluate their batches
+        # of hyperparameters or starting points with pool.map in this
+        # process, e.g. with a ThreadPoolExecutor, so the regressors are
+        # then not fitted in worker processes
+        map_func = None
+        if pool is not None:
+            map_func = pool.map
+            n_jobs = None
         smlist = []
-        for i in range(nOutput):
-            if logger is not None:
+        for i in range(len(targets)):
+            if logger is not None and shared_kernel:
+                logger.info(
+                    f"GPR_Matern: creating shared regressor for {nOutput} outputs..."
+                )
+            elif logger is not None:
                 logger.info(
                     f"GPR_Matern: creating regressor for output {i+1} of {nOutput}..."
                 )
@@ -2816,19 +3128,39 @@ class GPR_Matern:
                     f"GPR_Matern: y_{i} range is {(np.min(y[:,i]), np.max(y[:,i]))}..."
                 )
             if optimizer == "sceua":
-                optf = partial(sceua_optimizer, seed, logger)
+                optf = partial(sceua_optimizer, seeds[i], logger)
+            elif optimizer == "sceua_batch":
+                optf = partial(
+                    sceua_batch_optimizer, seeds[i], logger, map_func=map_func
+                )
+            elif optimizer == "lbfgs_multistart":
+                optf = partial(
+                    lbfgs_multistart_optimizer, seeds[i], logger, map_func=map_func
+                )
             elif optimizer == "dlib":
                 optf = partial(dlib_optimizer, logger)
             else:
-                optf = partial(sceua_optimizer, seed, logger)
+                optf = partial(sceua_optimizer, seeds[i], logger)
             # smlist.append(GaussianProcessRegressor(kernel=kernel, alpha=1e-5, n_restarts_optimizer=5))
             smlist.append(
-                GaussianProcessRegressor(
-                    kernel=kernel, optimizer=optf, normalize_y=True
-                )
+                DistanceCachedGPR(kernel=kernel, optimizer=optf, normalize_y=True)
+            )
+        self.n_train = x.shape[0]
+        if initial_hyperparameters is None:
+            self.smlist = fit_regressors(
+                smlist, x, targets, n_jobs=n_jobs, logger=logger
+            )
+        else:
+            self.smlist = fit_regressors_warm_start(
+                smlist,
+                x,
+                targets,
+                initial_hyperparameters,
+                warm_start_tol=warm_start_tol,
+                seed=seed,
+                n_jobs=n_jobs,
+                logger=logger,
             )
-            smlist[i].fit(x, y[:, i])
-        self.smlist = smlist
 
     def predict(self, xin):
         x = np.zeros_like(xin)
@@ -2840,16 +3172,51 @@ class GPR_Matern:
         y_vars = np.zeros((N, self.nOutput))
         for i in range(N):
             x[i, :] = (xin[i, :] - self.xlb) / self.xrg
-        for i in range(self.nOutput):
-            yp, ypstd = self.smlist[i].predict(x, return_std=True)
-            y[:, i] = yp
-            y_vars[:, i] = ypstd**2
+        for i, sm in enumerate(self.smlist):
+            yp, ypstd = sm.predict(x, return_std=True)
+            if self.shared_kernel:
+                y[:] = yp.reshape((N, -1))
+                y_vars[:] = ypstd.reshape((N, -1)) ** 2
+            else:
+                y[:, i] = yp
+                y_vars[:, i] = ypstd**2
         return y, y_vars
 
     def evaluate(self, x):
         mean, var = self.predict(x)
         return mean
 
+    def targets(self, y):
+        """Training targets of each regressor"""
+        if self.shared_kernel:
+            return [y]
+        return [y[:, i] for i in range(self.nOutput)]
+
+    def update(self, xin, yin):
+        """Adds the training points xin, yin to the regressors without
+        refitting the kernel parameters, by extending the Cholesky factor
+        of each regressor with the new points."""
+        xin = np.atleast_2d(xin)
+        y = np.nan_to_num(np.copy(yin)).reshape((xin.shape[0], self.nOutput))
+        x = (xin - self.xlb) / self.xrg
+        for i, target in enumerate(self.targets(y)):
+            self.smlist[i] = update_regressor(self.smlist[i], x, target)
+        self.xin = np.vstack((self.xin, xin))
+        self.n_train += x.shape[0]
+
+    def get_hyperparameters(self):
+        """Returns the fitted kernel parameters of each regressor and the
+        log-marginal likelihood per training point, which can be passed
+        as initial_hyperparameters to warm-start a later fit."""
+        return [
+            {
+                "theta": np.copy(sm.kernel_.theta),
+                "log_marginal_likelihood": sm.log_marginal_likelihood_value_
+                / self.n_train,
+            }
+            for sm in self.smlist
+        ]
+
 
 class GPR_RBF:
     def __init__(
@@ -2864,6 +3231,11 @@ class GPR_RBF:
         seed=None,
         length_scale_bounds=(1e-2, 100.0),
         anisotropic=False,
+        shared_kernel=False,
+        n_jobs=None,
+        initial_hyperparameters=None,
+        warm_start_tol=0.05,
+        pool=None,
         logger=None,
     ):
         self.nInput = nInput
@@ -2872,8 +3244,10 @@ class GPR_RBF:
         self.xub = xub
         self.xrg = xub - xlb
         self.logger = logger
+        # training inputs, which MOASMO.update checks for duplicates
+        self.xin = np.copy(xin)
 
-        N = x.shape[0]
+        N = xin.shape[0]
         x = np.zeros_like(xin)
         y = np.copy(yin)
         for i in range(N):
@@ -2887,9 +3261,27 @@ class GPR_RBF:
         kernel = ConstantKernel(1, (0.01, 100)) * RBF(
             length_scale=length_scale, length_scale_bounds=length_scale_bounds
         ) + WhiteKernel(noise_level=1e-5, noise_level_bounds=(1e-8, 1e-4))
+        # with a shared kernel, a single regressor is fitted to all outputs,
+        # so that the kernel matrix is factorized once for all of them
+        self.shared_kernel = shared_kernel
+        targets = self.targets(y)
+        # independent random streams for the optimizer of each regressor
+        seeds = np.random.SeedSequence(seed).spawn(len(targets))
+        # the batched and multi-start optimizers evaluate their batches
+        # of hyperparameters or starting points with pool.map in this
+        # process, e.g. with a ThreadPoolExecutor, so the regressors are
+        # then not fitted in worker processes
+        map_func = None
+        if pool is not None:
+            map_func = pool.map
+            n_jobs = None
         smlist = []
-        for i in range(nOutput):
-            if logger is not None:
+        for i in range(len(targets)):
+            if logger is not None and shared_kernel:
+                logger.info(
+                    f"GPR_RBF: creating shared regressor for {nOutput} outputs..."
+                )
+            elif logger is not None:
                 logger.info(
                     f"GPR_RBF: creating regressor for output {i+1} of {nOutput}..."
                 )
@@ -2897,19 +3289,39 @@ class GPR_RBF:
                     f"GPR_RBF: y_{i} range is {(np.min(y[:,i]), np.max(y[:,i]))}..."
                 )
             if optimizer == "sceua":
-                optf = partial(sceua_optimizer, seed, logger)
+                optf = partial(sceua_optimizer, seeds[i], logger)
+            elif optimizer == "sceua_batch":
+                optf = partial(
+                    sceua_batch_optimizer, seeds[i], logger, map_func=map_func
+                )
+            elif optimizer == "lbfgs_multistart":
+                optf = partial(
+                    lbfgs_multistart_optimizer, seeds[i], logger, map_func=map_func
+                )
             elif optimizer == "dlib":
                 optf = partial(dlib_optimizer, logger)
             else:
-                optf = partial(sceua_optimizer, seed, logger)
+                optf = partial(sceua_optimizer, seeds[i], logger)
             # smlist.append(GaussianProcessRegressor(kernel=kernel, alpha=1e-5, n_restarts_optimizer=5))
             smlist.append(
-                GaussianProcessRegressor(
-                    kernel=kernel, optimizer=optf, normalize_y=True
-                )
+                DistanceCachedGPR(kernel=kernel, optimizer=optf, normalize_y=True)
+            )
+        self.n_train = x.shape[0]
+        if initial_hyperparameters is None:
+            self.smlist = fit_regressors(
+                smlist, x, targets, n_jobs=n_jobs, logger=logger
+            )
+        else:
+            self.smlist = fit_regressors_warm_start(
+                smlist,
+                x,
+                targets,
+                initial_hyperparameters,
+                warm_start_tol=warm_start_tol,
+                seed=seed,
+                n_jobs=n_jobs,
+                logger=logger,
             )
-            smlist[i].fit(x, y[:, i])
-        self.smlist = smlist
 
     def predict(self, xin):
         x = np.zeros_like(xin)
@@ -2921,8 +3333,312 @@ class GPR_RBF:
         y_vars = np.zeros((N, self.nOutput))
         for i in range(N):
             x[i, :] = (xin[i, :] - self.xlb) / self.xrg
-        for i in range(self.nOutput):
-            yp, ypstd = self.smlist[i].predict(x, return_std=True)
+        for i, sm in enumerate(self.smlist):
+            yp, ypstd = sm.predict(x, return_std=True)
+            if self.shared_kernel:
+                y[:] = yp.reshape((N, -1))
+                y_vars[:] = ypstd.reshape((N, -1)) ** 2
+            else:
+                y[:, i] = yp
+                y_vars[:, i] = ypstd**2
+        return y, y_vars
+
+    def evaluate(self, x):
+        mean, var = self.predict(x)
+        return mean
+
+    def targets(self, y):
+        """Training targets of each regressor"""
+        if self.shared_kernel:
+            return [y]
+        return [y[:, i] for i in range(self.nOutput)]
+
+    def update(self, xin, yin):
+        """Adds the training points xin, yin to the regressors without
+        refitting the kernel parameters, by extending the Cholesky factor
+        of each regressor with the new points."""
+        xin = np.atleast_2d(xin)
+        y = np.nan_to_num(np.copy(yin)).reshape((xin.shape[0], self.nOutput))
+        x = (xin - self.xlb) / self.xrg
+        for i, target in enumerate(self.targets(y)):
+            self.smlist[i] = update_regressor(self.smlist[i], x, target)
+        self.xin = np.vstack((self.xin, xin))
+        self.n_train += x.shape[0]
+
+    def get_hyperparameters(self):
+        """Returns the fitted kernel parameters of each regressor and the
+        log-marginal likelihood per training point, which can be passed
+        as initial_hyperparameters to warm-start a later fit."""
+        return [
+            {
+                "theta": np.copy(sm.kernel_.theta),
+                "log_marginal_likelihood": sm.log_marginal_likelihood_value_
+                / self.n_train,
+            }
+            for sm in self.smlist
+        ]
+
+
+class SparseGPRegressor:
+    def __init__(
+        self,
+        n_inducing=200,
+        method="vfe",
+        anisotropic=False,
+        length_scale_bounds=(1e-3, 100.0),
+        constant_bounds=(0.01, 100.0),
+        noise_level_bounds=(1e-6, 0.1),
+        jitter=1e-6,
+        optimizer=None,
+        n_restarts=3,
+        seed=None,
+    ):
+        """
+        Sparse GP regression with the kernel ConstantKernel * Matern(nu=2.5)
+        + WhiteKernel, and inducing points placed at the k-means centroids
+        of the training inputs. The kernel parameters are fitted to the
+        FITC (Snelson and Ghahramani, 2006) or VFE (Titsias, 2009)
+        approximation of the log-marginal likelihood, so that fitting and
+        prediction cost O(n m^2) for n training points and m inducing
+        points. The parameters theta have the order and log scale of the
+        equivalent scikit-learn kernel.
+
+        n_inducing: number of inducing points; all training inputs are
+          used as inducing points if there are not more of them
+        method: "fitc" or "vfe"
+        optimizer: callable with the signature of the scikit-learn GPR
+          optimizers, defaults to lbfgs_multistart_optimizer with
+          n_restarts starting points
+        """
+        if method not in ("fitc", "vfe"):
+            raise ValueError(f"SparseGPRegressor: unknown method {method}")
+        self.n_inducing = n_inducing
+        self.method = method
+        self.anisotropic = anisotropic
+        self.length_scale_bounds = length_scale_bounds
+        self.constant_bounds = constant_bounds
+        self.noise_level_bounds = noise_level_bounds
+        self.jitter = jitter
+        self.optimizer = optimizer
+        self.n_restarts = n_restarts
+        self.seed = seed
+
+    @staticmethod
+    def _correlation(length_scale, A, B):
+        """Matern 5/2 correlation between the rows of A and B, and
+        G = -dk/dr / r, from which the length scale gradients follow"""
+        R = np.sqrt(5.0 * cdist(A / length_scale, B / length_scale, "sqeuclidean"))
+        E = np.exp(-R)
+        return (1.0 + R + R**2 / 3.0) * E, 5.0 / 3.0 * (1.0 + R) * E
+
+    @staticmethod
+    def _scaled_distance_sum(M, A, B, length_scale):
+        """sum_ij M_ij (A_ik - B_jk)^2 / length_scale_k^2 for each
+        dimension k, without forming the pairwise differences"""
+        s = M.sum(axis=1) @ A**2 - 2.0 * np.sum(A * (M @ B), axis=0)
+        s += M.sum(axis=0) @ B**2
+        return s / length_scale**2
+
+    def _factorize(self, constant, noise, Cuf, Cuu, y):
+        """Cholesky factors of Kuu and of I + Kuu^-1/2 Kuf Lambda^-1 Kfu
+        Kuu^-T/2, with Lambda the diagonal of the FITC or VFE covariance"""
+        m = Cuu.shape[0]
+        Luu = cholesky(
+            constant * (Cuu + self.jitter * np.eye(m)), lower=True, check_finite=False
+        )
+        Ut = solve_triangular(Luu, constant * Cuf, lower=True, check_finite=False)
+        if self.method == "fitc":
+            lam = np.maximum(constant - np.sum(Ut**2, axis=0), 0.0) + noise
+        else:
+            lam = np.full(Cuf.shape[1], noise)
+        Ul = Ut / lam
+        Lb = cholesky(np.eye(m) + Ul @ Ut.T, lower=True, check_finite=False)
+        c = solve_triangular(Lb, Ul @ y, lower=True, check_finite=False)
+        return Luu, Ut, Ul, lam, Lb, c
+
+    def log_marginal_likelihood(self, theta, eval_gradient=False):
+        """Approximate log-marginal likelihood of the training data and,
+        optionally, its gradient with respect to theta"""
+        X = self.X_train_
+        Z = self.Z_
+        y = self.y_train_
+        n = X.shape[0]
+        constant = np.exp(theta[0])
+        length_scale = np.exp(theta[1:-1])
+        noise = np.exp(theta[-1])
+        Cuf, Guf = self._correlation(length_scale, Z, X)
+        Cuu, Guu = self._correlation(length_scale, Z, Z)
+        try:
+            Luu, Ut, Ul, lam, Lb, c = self._factorize(constant, noise, Cuf, Cuu, y)
+        except np.linalg.LinAlgError:
+            return (-np.inf, np.zeros_like(theta)) if eval_gradient else -np.inf
+        qd = np.sum(Ut**2, axis=0)
+
+        lml = -0.5 * np.sum(y**2 / lam) + 0.5 * np.dot(c, c)
+        lml -= np.log(np.diag(Lb)).sum() + 0.5 * np.log(lam).sum()
+        lml -= n / 2 * np.log(2 * np.pi)
+        if self.method == "vfe":
+            lml -= 0.5 * (constant * n - qd.sum()) / noise
+        if not eval_gradient:
+            return lml
+
+        # With Sigma = Kfu Kuu^-1 Kuf + Lambda and W = beta beta^T - Sigma^-1,
+        # where beta = Sigma^-1 y, the gradients of the likelihood with
+        # respect to Kuf, Kuu and Lambda are Kuu^-1 Kuf W,
+        # -0.5 Kuu^-1 Kuf W Kfu Kuu^-1 and 0.5 diag(W)
+        V = solve_triangular(Lb, Ul, lower=True, check_finite=False)
+        beta = y / lam - Ul.T @ solve_triangular(
+            Lb, c, lower=True, trans="T", check_finite=False
+        )
+        AU = solve_triangular(Luu, Ut, lower=True, trans="T", check_finite=False)
+        dKuf = np.outer(AU @ beta, beta) - AU / lam + (AU @ V.T) @ V
+        dKuu = -0.5 * dKuf @ AU.T
+        g = 0.5 * (beta**2 - 1.0 / lam + np.sum(V**2, axis=0))
+        if self.method == "fitc":
+            # Lambda = diag(Kff - Kfu Kuu^-1 Kuf) + noise
+            dKuf -= 2.0 * AU * g
+            dKuu += (AU * g) @ AU.T
+            dKff = g.sum()
+            dnoise = g.sum()
+        else:
+            dKuf += AU / noise
+            dKuu -= 0.5 * AU @ AU.T / noise
+            dKff = -0.5 * n / noise
+            dnoise = g.sum() + 0.5 * (constant * n - qd.sum()) / noise**2
+
+        Kuu = constant * (Cuu + self.jitter * np.eye(Z.shape[0]))
+        grad = np.empty_like(theta)
+        grad[0] = np.sum(dKuf * constant * Cuf) + np.sum(dKuu * Kuu)
+        grad[0] += constant * dKff
+        grad_ls = self._scaled_distance_sum(constant * dKuf * Guf, Z, X, length_scale)
+        grad_ls += self._scaled_distance_sum(constant * dKuu * Guu, Z, Z, length_scale)
+        grad[1:-1] = grad_ls if self.anisotropic else np.sum(grad_ls)
+        grad[-1] = noise * dnoise
+        return lml, grad
+
+    def fit(self, X, y):
+        local_random = np.random.default_rng(seed=self.seed)
+        N, D = X.shape
+        self.X_train_ = np.copy(X)
+        self._y_train_mean = np.mean(y)
+        self._y_train_std = handle_zeros_in_scale(np.std(y), copy=False)
+        self.y_train_ = (y - self._y_train_mean) / self._y_train_std
+
+        if N <= self.n_inducing:
+            self.Z_ = np.copy(X)
+        else:
+            Zinit = X[local_random.choice(N, size=self.n_inducing, replace=False)]
+            self.Z_ = kmeans2(X, Zinit, minit="matrix")[0]
+
+        n_length_scale = D if self.anisotropic else 1
+        initial_theta = np.log([1.0] + [0.5] * n_length_scale + [1e-3])
+        bounds = np.log(
+            [self.constant_bounds]
+            + [self.length_scale_bounds] * n_length_scale
+            + [self.noise_level_bounds]
+        )
+
+        def obj_func(theta, eval_gradient=True):
+            if eval_gradient:
+                lml, grad = self.log_marginal_likelihood(theta, eval_gradient=True)
+                return -lml, -grad
+            return -self.log_marginal_likelihood(theta)
+
+        optimizer = self.optimizer
+        if optimizer is None:
+            optimizer = partial(
+                lbfgs_multistart_optimizer,
+                self.seed,
+                None,
+                n_restarts=self.n_restarts,
+            )
+        theta, func_min = optimizer(obj_func, initial_theta, bounds)
+        self.theta_ = np.asarray(theta)
+        self.log_marginal_likelihood_value_ = -func_min
+
+        length_scale = np.exp(self.theta_[1:-1])
+        Cuf, _ = self._correlation(length_scale, self.Z_, self.X_train_)
+        Cuu, _ = self._correlation(length_scale, self.Z_, self.Z_)
+        self._Luu, _, _, _, self._Lb, self._c = self._factorize(
+            np.exp(self.theta_[0]), np.exp(self.theta_[-1]), Cuf, Cuu, self.y_train_
+        )
+        return self
+
+    def predict(self, X, return_std=False):
+        constant = np.exp(self.theta_[0])
+        length_scale = np.exp(self.theta_[1:-1])
+        noise = np.exp(self.theta_[-1])
+        Cus, _ = self._correlation(length_scale, self.Z_, X)
+        kt = solve_triangular(self._Luu, constant * Cus, lower=True)
+        kb = solve_triangular(self._Lb, kt, lower=True)
+        y_mean = kb.T @ self._c * self._y_train_std + self._y_train_mean
+        if not return_std:
+            return y_mean
+        y_var = constant - np.sum(kt**2, axis=0) + np.sum(kb**2, axis=0) + noise
+        y_std = np.sqrt(np.maximum(y_var, 0.0)) * self._y_train_std
+        return y_mean, y_std
+
+
+class SGPR_Matern:
+    def __init__(
+        self,
+        xin,
+        yin,
+        nInput,
+        nOutput,
+        xlb,
+        xub,
+        method="vfe",
+        n_inducing=200,
+        n_restarts=3,
+        seed=None,
+        length_scale_bounds=(1e-3, 100.0),
+        anisotropic=False,
+        n_jobs=None,
+        top_k=None,
+        logger=None,
+    ):
+        self.nInput = nInput
+        self.nOutput = nOutput
+        self.xlb = xlb
+        self.xub = xub
+        self.xrg = xub - xlb
+        self.logger = logger
+
+        xin, yin = top_k_MO(xin, yin, top_k)
+
+        x = (xin - self.xlb) / self.xrg
+        y = np.nan_to_num(np.copy(yin)).reshape((xin.shape[0], nOutput))
+
+        seeds = np.random.SeedSequence(seed).spawn(nOutput)
+        smlist = []
+        for i in range(nOutput):
+            if logger is not None:
+                logger.info(
+                    f"SGPR_Matern: creating {method.upper()} regressor with "
+                    f"{min(n_inducing, x.shape[0])} inducing points "
+                    f"for output {i+1} of {nOutput}..."
+                )
+            smlist.append(
+                SparseGPRegressor(
+                    n_inducing=n_inducing,
+                    method=method,
+                    anisotropic=anisotropic,
+                    length_scale_bounds=length_scale_bounds,
+                    n_restarts=n_restarts,
+                    seed=seeds[i],
+                )
+            )
+        targets = [y[:, i] for i in range(nOutput)]
+        self.smlist = fit_regressors(smlist, x, targets, n_jobs=n_jobs, logger=logger)
+
+    def predict(self, xin):
+        x = (np.atleast_2d(xin) - self.xlb) / self.xrg
+        N = x.shape[0]
+        y = np.zeros((N, self.nOutput))
+        y_vars = np.zeros((N, self.nOutput))
+        for i, sm in enumerate(self.smlist):
+            yp, ypstd = sm.predict(x, return_std=True)
             y[:, i] = yp
             y_vars[:, i] = ypstd**2
         return y, y_vars
@@ -2932,6 +3648,142 @@ class GPR_RBF:
         return mean
 
 
+def _fit_regressor(regressor, x, y):
+    return regressor.fit(x, y)
+
+
+def fit_regressors(regressors, x, y, n_jobs=None, logger=None):
+    """
+    Fits regressor i to the targets y[i]. With n_jobs > 1, or -1 for
+    all available cores, the regressors are fitted concurrently in a
+    pool of worker processes. The workers are spawned rather than forked,
+    which is also safe in an MPI process such as the dmosopt controller.
+    Each regressor carries its own optimizer and seed, so the results do
+    not depend on n_jobs.
+    """
+    n = len(regressors)
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1 or n == 1:
+        for i in range(n):
+            regressors[i].fit(x, y[i])
+        return regressors
+
+    if logger is not None:
+        logger.info(f"GPR: fitting {n} regressors in {min(n_jobs, n)} processes")
+    with ProcessPoolExecutor(
+        max_workers=min(n_jobs, n), mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        return list(pool.map(_fit_regressor, regressors, [x] * n, y))
+
+
+def update_regressor(regressor, x, y):
+    """
+    Adds the training points x, y to a fitted GaussianProcessRegressor
+    while keeping its kernel parameters and target normalization. The
+    Cholesky factor L of the training covariance is extended by the
+    block of the new points,
+
+      [ L     0   ]
+      [ A^T  L_22 ],  A = L^-1 K_12,  L_22 L_22^T = K_22 - A^T A,
+
+    which costs O(n^2 k) for k new points instead of O(n^3) for a new
+    factorization. If the extended covariance is not positive definite,
+    e.g. because of points that duplicate training points, the regressor
+    is refitted with its current kernel parameters.
+    """
+    kernel = regressor.kernel_
+    y = (y - regressor._y_train_mean) / regressor._y_train_std
+    X_train = np.vstack((regressor.X_train_, x))
+    y_train = np.concatenate((regressor.y_train_, y))
+
+    K_12 = kernel(regressor.X_train_, x)
+    K_22 = kernel(x)
+    K_22[np.diag_indices_from(K_22)] += regressor.alpha
+    try:
+        A = solve_triangular(regressor.L_, K_12, lower=True, check_finite=False)
+        L_22 = cholesky(K_22 - A.T @ A, lower=True, check_finite=False)
+    except np.linalg.LinAlgError:
+        refit = clone(regressor).set_params(kernel=kernel, optimizer=None)
+        y_all = y_train * regressor._y_train_std + regressor._y_train_mean
+        return refit.fit(X_train, y_all)
+
+    n, k = A.shape
+    L = np.zeros((n + k, n + k))
+    L[:n, :n] = regressor.L_
+    L[n:, :n] = A.T
+    L[n:, n:] = L_22
+
+    regressor.X_train_ = X_train
+    regressor.y_train_ = y_train
+    regressor.L_ = L
+    regressor.alpha_ = cho_solve((L, True), y_train, check_finite=False)
+    return regressor
+
+
+def fit_regressors_warm_start(
+    regressors,
+    x,
+    y,
+    initial_hyperparameters,
+    warm_start_tol=0.05,
+    seed=None,
+    n_jobs=None,
+    logger=None,
+):
+    """
+    Fits regressor i to the targets y[i], starting from the kernel parameters
+    in initial_hyperparameters[i] (see GPR_Matern.get_hyperparameters)
+    with a single L-BFGS-B search instead of the configured optimizer.
+    A regressor is refitted from scratch with the configured optimizer
+    if its log-marginal likelihood per training point falls below the
+    previous value by more than warm_start_tol times its magnitude.
+    """
+    n = len(regressors)
+    if len(initial_hyperparameters) != n or any(
+        np.shape(h["theta"]) != regressors[i].kernel.theta.shape
+        for i, h in enumerate(initial_hyperparameters)
+    ):
+        if logger is not None:
+            logger.info("GPR: initial hyperparameters do not match the kernel")
+        return fit_regressors(regressors, x, y, n_jobs=n_jobs, logger=logger)
+
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    warm_regressors = [
+        clone(regressors[i]).set_params(
+            kernel=regressors[i].kernel.clone_with_theta(h["theta"]),
+            optimizer=partial(
+                lbfgs_multistart_optimizer, seeds[i], logger, n_restarts=1
+            ),
+        )
+        for i, h in enumerate(initial_hyperparameters)
+    ]
+    warm_regressors = fit_regressors(
+        warm_regressors, x, y, n_jobs=n_jobs, logger=logger
+    )
+
+    refit = []
+    for i, h in enumerate(initial_hyperparameters):
+        lml = warm_regressors[i].log_marginal_likelihood_value_ / x.shape[0]
+        lml_prev = h["log_marginal_likelihood"]
+        if lml < lml_prev - warm_start_tol * abs(lml_prev):
+            refit.append(i)
+    if len(refit) > 0:
+        if logger is not None:
+            logger.info(f"GPR: likelihood degraded, refitting outputs {refit}")
+        refitted = fit_regressors(
+            [regressors[i] for i in refit],
+            x,
+            [y[i] for i in refit],
+            n_jobs=n_jobs,
+            logger=logger,
+        )
+        for i, sm in zip(refit, refitted):
+            warm_regressors[i] = sm
+
+    return warm_regressors
+
+
 def dlib_optimizer(logger, obj_func, initial_theta, bounds):
     """
     dlib GFS optimizer for optimizing hyper parameters of GPR
@@ -2984,6 +3836,16 @@ def dlib_optimizer(logger, obj_func, initial_theta, bounds):
     return theta_opt, func_min
 
 
+def _objective_value(obj_func):
+    """Wraps a GPR objective so that the gradient is not computed for
+    derivative-free optimizers, which only use the first returned value."""
+
+    def func(theta):
+        return (obj_func(theta, eval_gradient=False),)
+
+    return func
+
+
 def sceua_optimizer(seed, logger, obj_func, initial_theta, bounds):
     """
     SCE-UA optimizer for optimizing hyper parameters of GPR
@@ -3009,13 +3871,125 @@ def sceua_optimizer(seed, logger, obj_func, initial_theta, bounds):
     pcento = 0.1
     peps = 0.001
     [bestx, bestf, icall, nloop, bestx_list, bestf_list, icall_list] = sceua(
-        obj_func, bl, bu, nopt, ngs, maxn, kstop, pcento, peps, seed=seed, logger=logger
+        _objective_value(obj_func),
+        bl,
+        bu,
+        nopt,
+        ngs,
+        maxn,
+        kstop,
+        pcento,
+        peps,
+        seed=seed,
+        logger=logger,
+    )
+    theta_opt = bestx
+    func_min = bestf
+    return theta_opt, func_min
+
+
+def sceua_batch_optimizer(seed, logger, obj_func, initial_theta, bounds, map_func=None):
+    """
+    Batched SCE-UA optimizer for optimizing hyper parameters of GPR,
+    with the same inputs, outputs and settings as sceua_optimizer.
+    map_func evaluates each batch of hyperparameters, e.g. the map
+    method of a thread pool; defaults to the builtin map.
+    """
+    nopt = len(bounds)
+    bl = np.asarray([b[0] for b in bounds])
+    bu = np.asarray([b[1] for b in bounds])
+    ngs = nopt
+    maxn = 3000
+    kstop = 10
+    pcento = 0.1
+    peps = 0.001
+    [bestx, bestf, icall, nloop, bestx_list, bestf_list, icall_list] = sceua_batch(
+        _objective_value(obj_func),
+        bl,
+        bu,
+        nopt,
+        ngs,
+        maxn,
+        kstop,
+        pcento,
+        peps,
+        seed=seed,
+        logger=logger,
+        map_func=map_func,
     )
     theta_opt = bestx
     func_min = bestf
     return theta_opt, func_min
 
 
+def lbfgs_multistart_optimizer(
+    seed,
+    logger,
+    obj_func,
+    initial_theta,
+    bounds,
+    n_restarts=8,
+    maxiter=200,
+    map_func=None,
+):
+    """
+    Multi-start L-BFGS-B optimizer for optimizing hyper parameters of GPR
+    Input:
+      * 'obj_func' is the objective function to be minimized, which
+        takes the hyperparameters theta as parameter and returns the
+        function value and its gradient
+      * 'initial_theta': the initial value for theta, which is the
+        first starting point
+      * 'bounds': the bounds on the values of theta,
+        [(lb1, ub1), (lb2, ub2), (lb3, ub3)]
+      * 'n_restarts': number of starting points; the points other than
+        initial_theta are drawn from a scrambled Sobol sequence
+      * 'maxiter': maximum number of L-BFGS-B iterations per start
+      * 'map_func': function that runs the local searches on a list of
+        starting points, defaults to the builtin map
+     Returned:
+      * 'theta_opt' is the best found hyperparameters theta
+      * 'func_min' is the corresponding value of the target function.
+    """
+    local_random = np.random.default_rng(seed=seed)
+    if map_func is None:
+        map_func = map
+
+    bounds = np.asarray(bounds, dtype=float)
+    lb = bounds[:, 0]
+    ub = bounds[:, 1]
+    starts = [np.clip(initial_theta, lb, ub)]
+    if n_restarts > 1:
+        starts.extend(
+            lb + (ub - lb) * sobol(n_restarts - 1, len(lb), local_random=local_random)
+        )
+
+    def local_search(theta0):
+        return minimize(
+            obj_func,
+            theta0,
+            method="L-BFGS-B",
+            jac=True,
+            bounds=bounds,
+            options={"maxiter": maxiter},
+        )
+
+    results = [res for res in map_func(local_search, starts) if np.isfinite(res.fun)]
+    if len(results) == 0:
+        raise RuntimeError("lbfgs_multistart_optimizer: all local searches failed")
+    best = min(results, key=lambda res: res.fun)
+    if logger is not None:
+        n_calls = sum(res.nfev for res in results)
+        logger.info(
+            f"GPR optimization: best value {best.fun} after {n_calls} evaluations "
+            f"from {len(starts)} starting points"
+        )
+
+    theta_opt = best.x
+    func_min = best.fun
+    return theta_opt, func_min
+
+
 def select_simplex(nps, npg, local_random):
     lcs = set([0])
     for k3 in range(1, nps):
@@ -3319,3 +4293,220 @@ def cceua(func, s, sf, bl, bu, icall, local_random):
 
     # END OF CCE
     return snew, fnew, icall
+
+
+def select_simplices(ngs, nps, npg, local_random):
+    """
+    Selects one simplex of nps points in each of ngs complexes of npg
+    sorted points. As in select_simplex, every simplex includes the
+    best point of its complex, and the other points are drawn without
+    replacement with probability decreasing linearly with their rank.
+    The draws use exponential keys, so all simplexes are selected with
+    one array of random numbers.
+    """
+    weights = npg - np.arange(1, npg, dtype=np.float64)
+    keys = np.log1p(-local_random.uniform(size=(ngs, npg - 1))) / weights
+    lcs = 1 + np.argsort(-keys, axis=1, kind="stable")[:, : nps - 1]
+    lcs = np.sort(lcs, axis=1)
+    return np.column_stack((np.zeros(ngs, dtype=lcs.dtype), lcs))
+
+
+def sceua_batch(
+    func,
+    bl,
+    bu,
+    nopt,
+    ngs,
+    maxn,
+    kstop,
+    pcento,
+    peps,
+    seed=None,
+    logger=None,
+    map_func=None,
+):
+    """
+    Batched variant of the SCE algorithm (see sceua). The complexes
+    evolve side by side: at each step, one simplex is selected in every
+    complex, and the reflection, contraction and random trial points of
+    all complexes are evaluated as one batch each. The initial
+    population is evaluated as a single batch as well. The stopping
+    criteria kstop, pcento and peps are those of sceua.
+
+    map_func: function that evaluates func on a list of points, such as
+              the map method of a concurrent.futures executor; defaults
+              to the builtin map. func must be safe to call concurrently
+              if map_func evaluates points in parallel.
+
+    Returns bestx, bestf, icall, nloop, bestx_list, bestf_list, icall_list
+    as sceua does.
+    """
+
+    verbose = logger is not None
+    local_random = np.random.default_rng(seed=seed)
+    if map_func is None:
+        map_func = map
+
+    def evaluate(X):
+        # only the first returned value is used
+        return np.asarray([fx[0] for fx in map_func(func, list(X))], dtype=float)
+
+    # Initialize SCE parameters:
+    npg = 2 * nopt + 1
+    nps = nopt + 1
+    nspl = npg
+    npt = npg * ngs
+    bd = bu - bl
+
+    # Create an initial population and evaluate it as one batch
+    x = local_random.uniform(size=(npt, nopt)) * bd + bl
+    xf = evaluate(x)
+    icall = npt
+
+    # Sort the population in order of increasing function values
+    idx = np.argsort(xf)
+    xf = xf[idx]
+    x = x[idx, :]
+
+    bestx_list = [np.copy(x[0, :])]
+    bestf_list = [np.copy(xf[0])]
+    icall_list = [icall]
+
+    if verbose:
+        logger.info("The Initial Loop: 0")
+        logger.info(f"BESTF  : {xf[0]:.2f}")
+        logger.info(f"BESTX  : {np.array2string(x[0, :])}")
+        logger.info(f"WORSTF : {xf[-1]:.2f}")
+        logger.info(f"WORSTX : {np.array2string(x[-1, :])}")
+        logger.info(" ")
+
+    # Computes the normalized geometric range of the parameters
+    gnrng = np.exp(np.mean(np.log((np.max(x, axis=0) - np.min(x, axis=0)) / bd)))
+
+    # Begin evolution loops:
+    nloop = 0
+    criter = []
+    criter_change = 1e5
+    # complex igs holds the points igs, igs + ngs, igs + 2 * ngs, ...
+    k2 = np.arange(npg)[None, :] * ngs + np.arange(ngs)[:, None]
+    rows = np.arange(ngs)[:, None]
+
+    while (icall < maxn) and (gnrng > peps) and (criter_change > pcento):
+        nloop += 1
+
+        # Partition the population into complexes (sub-populations)
+        cx = x[k2]
+        cf = xf[k2]
+
+        # Evolve all complexes for nspl steps
+        for loop in range(nspl):
+            lcs = select_simplices(ngs, nps, npg, local_random)
+            s = cx[rows, lcs]
+            sf = cf[rows, lcs]
+
+            snew, fnew, ncall = cceua_batch(evaluate, s, sf, bl, bu, local_random)
+            icall += ncall
+
+            # Replace the worst point of each simplex with the new point
+            cx[rows[:, 0], lcs[:, -1]] = snew
+            cf[rows[:, 0], lcs[:, -1]] = fnew
+
+            # Sort the complexes
+            idx = np.argsort(cf, axis=1, kind="stable")
+            cf = np.take_along_axis(cf, idx, axis=1)
+            cx = cx[rows, idx]
+
+        # Replace the complexes back into the population and shuffle
+        x[k2] = cx
+        xf[k2] = cf
+        idx = np.argsort(xf)
+        xf = xf[idx]
+        x = x[idx, :]
+
+        # Record the best and worst points
+        bestx_list.append(np.copy(x[0, :]))
+        bestf_list.append(np.copy(xf[0]))
+        icall_list.append(icall)
+
+        if verbose:
+            logger.info(f"Evolution Loop: {nloop} - Trial - {icall}")
+            logger.info(f"BESTF  : {xf[0]:.2f}")
+            logger.info(f"BESTX  : {np.array2string(x[0, :])}")
+            logger.info(f"WORSTF : {xf[-1]:.2f}")
+            logger.info(f"WORSTX : {np.array2string(x[-1, :])}")
+            logger.info(" ")
+
+        # Computes the normalized geometric range of the parameters
+        gnrng = np.exp(np.mean(np.log((np.max(x, axis=0) - np.min(x, axis=0)) / bd)))
+
+        criter.append(xf[0])
+        if nloop >= kstop:
+            criter_change = np.abs(criter[nloop - 1] - criter[nloop - kstop]) * 100
+            criter_change /= np.mean(np.abs(criter[nloop - kstop : nloop]))
+
+    if verbose:
+        if icall >= maxn:
+            logger.info(f"ON THE MAXIMUM NUMBER OF TRIALS {maxn} HAS BEEN EXCEEDED!")
+        if gnrng < peps:
+            logger.info(
+                "THE POPULATION HAS CONVERGED TO A PRESPECIFIED SMALL PARAMETER SPACE"
+            )
+        logger.info(f"SEARCH WAS STOPPED AT TRIAL NUMBER: {icall}")
+        logger.info(f"NORMALIZED GEOMETRIC RANGE = {gnrng}")
+        logger.info(
+            f"THE BEST POINT HAS IMPROVED IN LAST {kstop} LOOPS BY {criter_change:.4f}%"
+        )
+
+    bestx = np.copy(x[0, :])
+    bestf = np.copy(xf[0])
+    return bestx, bestf, icall, nloop, bestx_list, bestf_list, icall_list
+
+
+def cceua_batch(evaluate, s, sf, bl, bu, local_random):
+    """
+    Generates a new point in each simplex of s, as cceua does for a
+    single simplex, evaluating the trial points of all simplexes as
+    one batch per stage.
+    evaluate: function that returns the values of an array of points
+    s[.,.,.]: the simplexes, each sorted in order of increasing function values
+    sf[.,.]:  function values in increasing order
+    Returns the new points, their function values and the number of
+    function evaluations.
+    """
+
+    ngs, nps, nopt = s.shape
+    alpha = 1.0
+    beta = 0.5
+
+    # Assign the worst points:
+    sw = s[:, -1, :]
+    fw = sf[:, -1]
+
+    # Compute the centroids of the simplexes excluding the worst points:
+    ce = np.mean(s[:, :-1, :], axis=1)
+
+    # Attempt reflection points, replacing those outside the bounds
+    # with random points
+    snew = ce + alpha * (ce - sw)
+    outside = np.any((snew < bl) | (snew > bu), axis=1)
+    n_outside = np.count_nonzero(outside)
+    if n_outside > 0:
+        snew[outside] = bl + local_random.random((n_outside, nopt)) * (bu - bl)
+    fnew = evaluate(snew)
+    ncall = ngs
+
+    # Where reflection failed, attempt contraction points
+    failed = np.flatnonzero(fnew > fw)
+    if len(failed) > 0:
+        snew[failed] = sw[failed] + beta * (ce[failed] - sw[failed])
+        fnew[failed] = evaluate(snew[failed])
+        ncall += len(failed)
+
+        # Where both reflection and contraction failed, attempt random points
+        failed = failed[fnew[failed] > fw[failed]]
+        if len(failed) > 0:
+            snew[failed] = bl + local_random.random((len(failed), nopt)) * (bu - bl)
+            fnew[failed] = evaluate(snew[failed])
+            ncall += len(failed)
+
+    return snew, fnew, ncall
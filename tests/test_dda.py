@@ -1,5 +1,7 @@
 import numpy as np
 
+from dmosopt import dda
+
 
 def comparison_matrix(y, output=None):
     """Construct comparison matrix for input vector y
@@ -104,3 +106,81 @@ print(D)
 
 
 print(dda_ns(Y))
+
+
+def random_objectives(seed, n_cases, n_range=(1, 80), d_range=(1, 5), max_int=4):
+    """Yields the random generator and a random objective matrix for each
+    of n_cases cases. Every other case has small integer entries, so that
+    it contains ties and duplicate solutions."""
+    local_random = np.random.default_rng(seed)
+    for i in range(n_cases):
+        n = local_random.integers(*n_range)
+        d = local_random.integers(*d_range)
+        if i % 2 == 0:
+            Y = local_random.integers(0, max_int, size=(n, d)).astype(np.float64)
+        else:
+            Y = local_random.random((n, d))
+        yield local_random, Y
+
+
+def test_vectorized_dda_matches_reference():
+    for local_random, Y in random_objectives(0, 50):
+        tile_size = local_random.integers(1, 32)
+        rank_ref, D_ref = dda_ns(Y, return_dom=True)
+        rank, D = dda.dda_non_dominated_sort(Y, return_dom=True, tile_size=tile_size)
+        assert np.array_equal(rank, rank_ref)
+        assert np.array_equal(D, D_ref)
+        assert np.array_equal(
+            dda.comparison_matrix(Y[:, 0]), comparison_matrix(Y[:, 0])
+        )
+
+
+def test_incremental_sort_matches_full_sort():
+    for local_random, Y in random_objectives(1, 50, n_range=(0, 90), max_int=5):
+        n = local_random.integers(0, Y.shape[0] + 1)
+        rank_old = dda.dda_non_dominated_sort(Y[:n])
+        rank = dda.incremental_non_dominated_sort(Y[:n], rank_old, Y[n:])
+        assert np.array_equal(rank, dda.dda_non_dominated_sort(Y))
+
+
+def test_low_dimensional_sort_matches_reference():
+    for d, sort in ((2, dda.non_dominated_sort_2d), (3, dda.non_dominated_sort_3d)):
+        for _, Y in random_objectives(
+            d, 50, n_range=(1, 100), d_range=(d, d + 1), max_int=5
+        ):
+            rank_ref = dda_ns(Y)
+            assert np.array_equal(dda.dda_non_dominated_sort(Y), rank_ref)
+            assert np.array_equal(sort(Y), rank_ref)
+
+
+def test_blocked_sort_matches_reference():
+    for local_random, Y in random_objectives(3, 50, d_range=(1, 7)):
+        max_memory = local_random.integers(1, 4096)
+        assert np.array_equal(
+            dda.blocked_non_dominated_sort(Y, max_memory=max_memory), dda_ns(Y)
+        )
+
+
+def test_non_dominated_front_matches_reference():
+    for local_random, Y in random_objectives(4, 50, d_range=(1, 6)):
+        block_size = local_random.integers(1, 32)
+        assert np.array_equal(
+            dda.non_dominated_front(Y, block_size=block_size),
+            np.flatnonzero(dda_ns(Y) == 0),
+        )
+
+
+def test_partial_sort_matches_reference():
+    for local_random, Y in random_objectives(5, 60, d_range=(1, 6)):
+        max_count = local_random.integers(1, Y.shape[0] + 1)
+        rank_ref = dda_ns(Y)
+        counts = np.cumsum(np.bincount(rank_ref))
+        last_rank = np.searchsorted(counts, max_count)
+        expected = np.where(rank_ref <= last_rank, rank_ref, dda.UNRANKED)
+        assert np.array_equal(
+            dda.dda_non_dominated_sort(Y, max_count=max_count), expected
+        )
+        assert np.array_equal(
+            dda.blocked_non_dominated_sort(Y, max_memory=1024, max_count=max_count),
+            expected,
+        )
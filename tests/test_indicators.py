@@ -0,0 +1,136 @@
+import numpy as np
+from dmosopt.dda import non_dominated_front
+from dmosopt.hv import HyperVolume, hypervolume_2d, hypervolume_3d
+from dmosopt.indicators import (
+    Hypervolume,
+    HypervolumeArchive,
+    MonteCarloHypervolume,
+    hypervolume_contributions,
+)
+
+
+def leave_one_out(F, ref_point):
+    indicator = Hypervolume(ref_point=ref_point, nds=True)
+    total = indicator.do(F)
+    return np.asarray(
+        [total - indicator.do(np.delete(F, i, axis=0)) for i in range(len(F))]
+    )
+
+
+def test_hypervolume_contributions_2d():
+    # a staircase of unit boxes, a point dominated by the middle one that
+    # covers a quarter of its box, and a point outside the reference box
+    F = np.asarray([[1.0, 3.0], [2.0, 2.0], [3.0, 1.0], [2.5, 2.5], [5.0, 0.0]])
+    contrib = hypervolume_contributions(F, np.asarray([4.0, 4.0]))
+    assert np.allclose(contrib, [1.0, 0.75, 1.0, 0.0, 0.0])
+
+
+def test_hypervolume_contributions_match_leave_one_out():
+    data = np.random.default_rng(0)
+    for d in (3, 4):
+        F = data.random((25, d))
+        F /= np.linalg.norm(F, axis=1, keepdims=True)
+        F[3] = F[4]
+        F[5] = F[6] + 0.01
+        ref_point = np.full(d, 1.1)
+        contrib = hypervolume_contributions(F, ref_point)
+        assert np.allclose(contrib, leave_one_out(F, ref_point))
+        assert contrib[3] == contrib[4] == contrib[5] == 0.0
+
+
+def test_hypervolume_2d_staircase():
+    # three steps of 3, 2 and 1 unit boxes, with a duplicate, a dominated
+    # point and a point outside the reference box
+    F = np.asarray(
+        [[2.0, 2.0], [1.0, 3.0], [3.0, 1.0], [2.0, 2.0], [3.0, 3.0], [5.0, 0.0]]
+    )
+    assert hypervolume_2d(F, np.asarray([4.0, 4.0])) == 6.0
+    assert hypervolume_2d(F[4:], np.asarray([4.0, 4.0])) == 1.0
+
+
+def test_hypervolume_3d_overlapping_boxes():
+    # three 3 x 3 x 1 boxes, which pairwise overlap in 1 x 1 x 3 boxes and
+    # all overlap in a unit cube: 27 - 9 + 1
+    F = np.asarray(
+        [
+            [1.0, 1.0, 3.0],
+            [1.0, 3.0, 1.0],
+            [3.0, 1.0, 1.0],
+            [1.0, 3.0, 1.0],
+            [2.0, 2.0, 3.5],
+            [5.0, 0.0, 0.0],
+        ]
+    )
+    assert hypervolume_3d(F, np.asarray([4.0, 4.0, 4.0])) == 19.0
+
+
+def test_hypervolume_kernels_match_recursive():
+    data = np.random.default_rng(1)
+    for d, hypervolume in ((2, hypervolume_2d), (3, hypervolume_3d)):
+        # integer coordinates give ties in every dimension
+        F = np.vstack((data.integers(0, 4, size=(30, d)), data.random((30, d)) * 4))
+        ref_point = np.full(d, 3.5)
+        G = np.unique(F[non_dominated_front(F)], axis=0)
+        expected = HyperVolume(ref_point).compute(G)
+        assert np.isclose(hypervolume(F, ref_point), expected)
+
+
+def test_monte_carlo_hypervolume_matches_exact():
+    local_random = np.random.default_rng(2)
+    for d in (2, 4):
+        F = local_random.random((40, d))
+        F /= np.linalg.norm(F, axis=1, keepdims=True)
+        ref_point = np.full(d, 1.1)
+        expected = Hypervolume(ref_point=ref_point, nds=True).do(F)
+        indicator = MonteCarloHypervolume(
+            ref_point=ref_point, nds=True, rel_tol=0.002, local_random=local_random
+        )
+        assert np.isclose(indicator.do(F), expected, rtol=0.01)
+
+
+def test_monte_carlo_contributions_resolve_smallest():
+    # the smallest contribution is about 1/10 of the largest, and still
+    # needs to be estimated to rel_tol; the last point is dominated
+    F = np.random.default_rng(0).random((8, 4))
+    F /= np.linalg.norm(F, axis=1, keepdims=True)
+    F = np.vstack((F, F[0] + 0.01))
+    ref_point = np.full(4, 1.1)
+    expected = hypervolume_contributions(F, ref_point)
+    smallest = np.argmin(np.where(expected > 0.0, expected, np.inf))
+    for seed in range(5):
+        indicator = MonteCarloHypervolume(
+            ref_point=ref_point,
+            rel_tol=0.05,
+            max_samples=None,
+            local_random=np.random.default_rng(seed),
+        )
+        contrib = indicator.contributions(F)
+        assert np.isclose(contrib[smallest], expected[smallest], rtol=0.15)
+        assert contrib[-1] == 0.0
+
+
+def test_hypervolume_archive_staircase():
+    archive = HypervolumeArchive(np.asarray([4.0, 4.0]))
+    assert archive.add(np.asarray([2.0, 2.0])) == 4.0
+    # outside the reference box, dominated, and a duplicate
+    assert archive.add([[5.0, 0.0], [3.0, 3.0], [2.0, 2.0]]) == 4.0
+    assert archive.add([[1.0, 3.0], [3.0, 1.0]]) == 6.0
+    # dominates (2, 2) and (3, 1)
+    assert archive.add([[1.5, 1.0]]) == 8.0
+    assert np.array_equal(
+        archive.front[np.lexsort(archive.front.T)], [[1.5, 1.0], [1.0, 3.0]]
+    )
+
+
+def test_hypervolume_archive_matches_batch():
+    data = np.random.default_rng(4)
+    for d in (3, 4):
+        F = np.vstack((data.integers(0, 4, size=(30, d)), data.random((30, d)) * 4))
+        ref_point = np.full(d, 3.5)
+        archive = HypervolumeArchive(ref_point)
+        for batch in np.array_split(F, 5):
+            value = archive.add(batch)
+        expected = Hypervolume(ref_point=ref_point, nds=True).do(
+            F[np.all(F < ref_point, axis=1)]
+        )
+        assert np.isclose(value, expected)
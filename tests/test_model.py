@@ -0,0 +1,341 @@
+import sys
+import types
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.base import clone
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, RBF, WhiteKernel
+from dmosopt import MOASMO, model
+from dmosopt.model import (
+    DistanceCachedGPR,
+    GPR_Matern,
+    GPR_RBF,
+    KernelLikelihood,
+    SGPR_Matern,
+    SparseGPRegressor,
+    sceua_batch,
+    state_dict_matches,
+)
+
+
+def branin(x):
+    x1 = 15.0 * x[:, 0] - 5.0
+    x2 = 15.0 * x[:, 1]
+    return np.column_stack(
+        (
+            (x2 - 5.1 / (4 * np.pi**2) * x1**2 + 5.0 / np.pi * x1 - 6.0) ** 2
+            + 10.0 * (1.0 - 1.0 / (8.0 * np.pi)) * np.cos(x1),
+            np.sum(x**2, axis=1),
+        )
+    )
+
+
+def training_data(n=30, seed=0):
+    x = np.random.default_rng(seed).random((n, 2))
+    return x, branin(x)
+
+
+def test_gpr_regressors_get_own_seeds():
+    x, y = training_data()
+    kwargs = dict(optimizer="lbfgs_multistart", seed=1)
+    gpr = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), **kwargs)
+    seeds = [sm.optimizer.args[0] for sm in gpr.smlist]
+    assert [s.spawn_key for s in seeds] == [(0,), (1,)]
+    assert seeds[0].entropy == seeds[1].entropy == 1
+    # the same seed gives the same fit
+    again = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), **kwargs)
+    for sm, sm_again in zip(gpr.smlist, again.smlist):
+        assert np.array_equal(sm.kernel_.theta, sm_again.kernel_.theta)
+
+
+def test_fit_regressors_pool_matches_serial():
+    x, y = training_data()
+    kwargs = dict(optimizer="lbfgs_multistart", seed=2)
+    serial = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), **kwargs)
+    pooled = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), n_jobs=2, **kwargs)
+    for sm, sm_pooled in zip(serial.smlist, pooled.smlist):
+        assert np.array_equal(sm.kernel_.theta, sm_pooled.kernel_.theta)
+    assert np.array_equal(serial.predict(x[:5])[0], pooled.predict(x[:5])[0])
+
+
+def test_fit_regressors_uses_pool_under_mpi(monkeypatch):
+    # the dmosopt controller always has mpi4py loaded through distwq
+    pools = []
+
+    class SpawnedPool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context):
+            pools.append(mp_context.get_start_method())
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setitem(sys.modules, "mpi4py", types.ModuleType("mpi4py"))
+    monkeypatch.setenv("PMI_SIZE", "2")
+    monkeypatch.setattr(model, "ProcessPoolExecutor", SpawnedPool)
+    x, y = training_data()
+    gpr = GPR_Matern(
+        x, y, 2, 2, np.zeros(2), np.ones(2), optimizer="lbfgs_multistart", n_jobs=2
+    )
+    assert pools == ["spawn"]
+    assert len(gpr.smlist) == 2
+
+
+class RecordingPool:
+    """Thread pool that records the size of each batch it maps"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.batches = []
+
+    def map(self, func, items):
+        items = list(items)
+        self.batches.append(len(items))
+        return self.executor.map(func, items)
+
+
+def sphere(x):
+    return (np.sum((x - 0.3) ** 2),)
+
+
+def test_batched_sceua_converges():
+    bl = -2.0 * np.ones(3)
+    bu = 2.0 * np.ones(3)
+    bestx, bestf, icall, nloop, _, _, _ = sceua_batch(
+        sphere, bl, bu, 3, 3, 3000, 10, 0.1, 0.001, seed=1
+    )
+    assert bestf < 1e-4
+    assert np.allclose(bestx, 0.3, atol=1e-2)
+
+    pool = RecordingPool()
+    pooled = sceua_batch(
+        sphere, bl, bu, 3, 3, 3000, 10, 0.1, 0.001, seed=1, map_func=pool.map
+    )
+    assert np.array_equal(pooled[0], bestx) and pooled[1] == bestf
+    # the initial population of 3 complexes of 7 points is one batch
+    assert pool.batches[0] == 21 and sum(pool.batches) == icall
+
+
+def test_gpr_sceua_batch_evaluates_in_pool():
+    x, y = training_data()
+    kwargs = dict(optimizer="sceua_batch", seed=3)
+    serial = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), **kwargs)
+    pool = RecordingPool()
+    pooled = GPR_Matern(
+        x, y, 2, 2, np.zeros(2), np.ones(2), pool=pool, n_jobs=2, **kwargs
+    )
+    assert len(pool.batches) > 0
+    for sm, sm_pooled in zip(serial.smlist, pooled.smlist):
+        assert np.array_equal(sm.kernel_.theta, sm_pooled.kernel_.theta)
+
+
+def test_gpr_lbfgs_multistart_matches_sceua():
+    # the previous default optimizer, SCE-UA, bounds the likelihood
+    # that the multi-start search is expected to reach
+    x, y = training_data()
+    reference = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), seed=0)
+    kwargs = dict(optimizer="lbfgs_multistart", seed=0)
+    serial = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), **kwargs)
+    pool = RecordingPool()
+    pooled = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), pool=pool, **kwargs)
+    # one batch of 8 starting points per output
+    assert pool.batches == [8, 8]
+    for sm_ref, sm, sm_pooled in zip(reference.smlist, serial.smlist, pooled.smlist):
+        lml_ref = sm_ref.log_marginal_likelihood_value_
+        assert sm.log_marginal_likelihood_value_ >= lml_ref - 1e-6 * abs(lml_ref)
+        assert np.array_equal(sm.kernel_.theta, sm_pooled.kernel_.theta)
+
+
+def test_gpr_warm_start_matches_cold_fit():
+    x, y = training_data(40)
+    bounds = (2, 2, np.zeros(2), np.ones(2))
+    kwargs = dict(optimizer="lbfgs_multistart", seed=4)
+    previous = GPR_Matern(x[:30], y[:30], *bounds, **kwargs)
+    cold = GPR_Matern(x, y, *bounds, **kwargs)
+    warm = GPR_Matern(
+        x,
+        y,
+        *bounds,
+        initial_hyperparameters=previous.get_hyperparameters(),
+        **kwargs,
+    )
+    for h_cold, h_warm in zip(cold.get_hyperparameters(), warm.get_hyperparameters()):
+        lml = h_cold["log_marginal_likelihood"]
+        assert h_warm["log_marginal_likelihood"] >= lml - 0.01 * abs(lml)
+
+
+def test_gpr_warm_start_shape_mismatch_fits_cold():
+    x, y = training_data()
+    bounds = (2, 2, np.zeros(2), np.ones(2))
+    kwargs = dict(optimizer="lbfgs_multistart", seed=5, anisotropic=True)
+    isotropic = GPR_Matern(x, y, *bounds, optimizer="lbfgs_multistart")
+    cold = GPR_Matern(x, y, *bounds, **kwargs)
+    warm = GPR_Matern(
+        x,
+        y,
+        *bounds,
+        initial_hyperparameters=isotropic.get_hyperparameters(),
+        **kwargs,
+    )
+    for sm_cold, sm_warm in zip(cold.smlist, warm.smlist):
+        assert np.array_equal(sm_cold.kernel_.theta, sm_warm.kernel_.theta)
+
+
+def test_state_dict_matches():
+    class Module:
+        def __init__(self, **state):
+            self.state = state
+
+        def state_dict(self):
+            return self.state
+
+    module = Module(lengthscale=np.ones((1, 3)), noise=np.ones(1))
+    assert state_dict_matches(
+        module, {"lengthscale": np.zeros((1, 3)), "noise": np.zeros(1)}
+    )
+    assert not state_dict_matches(
+        module, {"lengthscale": np.zeros((1, 2)), "noise": np.zeros(1)}
+    )
+    assert not state_dict_matches(module, {"lengthscale": np.zeros((1, 3))})
+
+
+def test_gpr_update_matches_refit():
+    x, y = training_data(40)
+    sm = GPR_Matern(
+        x[:30], y[:30], 2, 2, np.zeros(2), np.ones(2), optimizer="lbfgs_multistart"
+    )
+    sm.update(x[30:], y[30:])
+    assert np.array_equal(sm.xin, x) and sm.n_train == 40
+    x_test = np.random.default_rng(6).random((20, 2))
+    for i, regressor in enumerate(sm.smlist):
+        # a regressor refitted on all points with the same kernel
+        # parameters and target normalization
+        reference = clone(regressor).set_params(
+            kernel=regressor.kernel_, optimizer=None, normalize_y=False
+        )
+        y_norm = (y[:, i] - regressor._y_train_mean) / regressor._y_train_std
+        reference.fit(x, y_norm)
+        mean, std = regressor.predict(x_test, return_std=True)
+        mean_ref, std_ref = reference.predict(x_test, return_std=True)
+        assert np.allclose(
+            mean, mean_ref * regressor._y_train_std + regressor._y_train_mean
+        )
+        assert np.allclose(std, std_ref * regressor._y_train_std)
+
+
+def test_gpr_update_replaces_nan_targets():
+    x, y = training_data(35)
+    y[32, 1] = np.nan
+    for cls in (GPR_Matern, GPR_RBF):
+        sm = cls(
+            x[:30], y[:30], 2, 2, np.zeros(2), np.ones(2), optimizer="lbfgs_multistart"
+        )
+        sm.update(x[30:], y[30:])
+        assert np.all(np.isfinite(sm.predict(x)[0]))
+        # the missing value is trained as 0, as in the initial fit
+        regressor = sm.smlist[1]
+        assert regressor.y_train_[32] * regressor._y_train_std == pytest.approx(
+            -regressor._y_train_mean
+        )
+
+
+def test_moasmo_update_skips_training_duplicates():
+    x, y = training_data(30)
+    sm = GPR_Matern(
+        x[:20], y[:20], 2, 2, np.zeros(2), np.ones(2), optimizer="lbfgs_multistart"
+    )
+    # two points that are already in the training set, one infeasible
+    # point, and a repeated new point
+    x_new = np.vstack((x[3], x[20:25], x[11], x[22]))
+    y_new = np.vstack((y[3], y[20:25], y[11], y[22]))
+    C = np.ones((len(x_new), 1))
+    C[2] = -1.0
+    MOASMO.update(sm, x_new, y_new, C=C)
+    assert np.array_equal(sm.xin, np.vstack((x[:20], x[20], x[22:25])))
+    assert sm.smlist[0].X_train_.shape == (24, 2)
+
+
+def test_gpr_shared_kernel_matches_per_output():
+    x, y = training_data()
+    x_test = np.random.default_rng(7).random((20, 2))
+    shared = GPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), shared_kernel=True, seed=8)
+    assert len(shared.smlist) == 1
+    mean, var = shared.predict(x_test)
+    # per-output regressors with the kernel parameters of the shared fit
+    # factorize the same kernel matrix
+    regressor = shared.smlist[0]
+    lml = 0.0
+    for i in range(2):
+        reference = clone(regressor).set_params(
+            kernel=regressor.kernel_, optimizer=None
+        )
+        reference.fit(x, y[:, i])
+        mean_ref, std_ref = reference.predict(x_test, return_std=True)
+        assert np.allclose(mean[:, i], mean_ref)
+        assert np.allclose(var[:, i], std_ref**2)
+        lml += reference.log_marginal_likelihood_value_
+    # the shared kernel maximizes the sum of the per-output likelihoods
+    assert np.isclose(regressor.log_marginal_likelihood_value_, lml)
+
+
+def test_distance_cached_likelihood_matches_sklearn():
+    x, y = training_data()
+    theta = np.log([0.8, 0.3, 0.5, 1e-2])
+    for corr in (Matern(nu=1.5), Matern(nu=2.5), RBF(), Matern(np.ones(2), nu=2.5)):
+        kernel = ConstantKernel() * corr + WhiteKernel()
+        assert KernelLikelihood.supports(kernel)
+        # two targets, as fitted by a shared kernel
+        reference = GaussianProcessRegressor(kernel=kernel, optimizer=None).fit(x, y)
+        cached = DistanceCachedGPR(kernel=kernel, optimizer=None).fit(x, y)
+        params = theta if corr.anisotropic else np.delete(theta, 2)
+        lml_ref, grad_ref = reference.log_marginal_likelihood(
+            params, eval_gradient=True
+        )
+        lml, grad = cached.log_marginal_likelihood(params, eval_gradient=True)
+        assert np.isclose(lml, lml_ref)
+        assert np.allclose(grad, grad_ref)
+
+
+def test_distance_cached_fit_matches_sklearn():
+    x, y = training_data()
+    kernel = ConstantKernel() * Matern(nu=2.5) + WhiteKernel(1e-3)
+    reference = GaussianProcessRegressor(kernel=kernel, normalize_y=True).fit(
+        x, y[:, 1]
+    )
+    cached = DistanceCachedGPR(kernel=kernel, normalize_y=True).fit(x, y[:, 1])
+    assert np.allclose(cached.kernel_.theta, reference.kernel_.theta, atol=1e-4)
+    assert cached._likelihood is None
+    # kernels with fixed parameters use the scikit-learn evaluation
+    fixed = ConstantKernel(constant_value_bounds="fixed") * Matern() + WhiteKernel()
+    assert not KernelLikelihood.supports(fixed)
+
+
+def test_sparse_gp_matches_exact_gp():
+    x, y = training_data(50)
+    y = (y - np.mean(y, axis=0)) / np.std(y, axis=0)
+    theta = np.log([1.0, 0.3, 1e-2])
+    kernel = ConstantKernel() * Matern(nu=2.5) + WhiteKernel()
+    x_test = np.random.default_rng(9).random((10, 2))
+    for method in ("fitc", "vfe"):
+        # with every training point as an inducing point, both
+        # approximations reduce to the exact GP
+        sm = SGPR_Matern(x, y, 2, 2, np.zeros(2), np.ones(2), method=method, seed=1)
+        for regressor in sm.smlist:
+            exact = GaussianProcessRegressor(kernel=kernel, optimizer=None)
+            exact.fit(x, regressor.y_train_)
+            lml_exact = exact.log_marginal_likelihood(theta)
+            assert np.isclose(
+                regressor.log_marginal_likelihood(theta), lml_exact, atol=1e-2
+            )
+            fitted = GaussianProcessRegressor(
+                kernel=kernel.clone_with_theta(regressor.theta_), optimizer=None
+            ).fit(x, regressor.y_train_)
+            mean = regressor.predict(x_test)
+            mean_exact = fitted.predict(x_test) * regressor._y_train_std
+            assert np.allclose(mean, mean_exact + regressor._y_train_mean, atol=1e-2)
+
+    # with fewer inducing points, VFE is a lower bound of the exact
+    # likelihood
+    sparse = SparseGPRegressor(n_inducing=10, method="vfe", seed=2).fit(x, y[:, 0])
+    assert len(sparse.Z_) == 10
+    exact = GaussianProcessRegressor(kernel=kernel, optimizer=None)
+    exact.fit(x, sparse.y_train_)
+    assert sparse.log_marginal_likelihood(theta) < exact.log_marginal_likelihood(theta)
@@ -0,0 +1,397 @@
+from functools import reduce
+import numpy as np
+from scipy.spatial.distance import cdist
+from dmosopt.MOEA import (
+    Struct,
+    crossover_sbx,
+    crossover_sbx_batch,
+    crowding_distance,
+    crowding_distance_fronts,
+    generate_offspring,
+    get_duplicates,
+    mutation,
+    mutation_batch,
+    remove_worst,
+    sortMO,
+    tournament_prob,
+    tournament_selection,
+)
+from dmosopt.AGEMOEA import (
+    find_corner_solutions,
+    get_geometry,
+    normalize,
+    survival_score,
+)
+from dmosopt.CMAES import CMAES
+from dmosopt.dda import dda_non_dominated_sort
+from dmosopt.SMPSO import SMPSO, velocity_vector
+
+
+def test_remove_worst_matches_full_sort():
+    # with distance metrics that do not depend on the other individuals,
+    # the survivors are the first individuals of the full sort, although
+    # the whole fronts are not reordered by distance
+    local_random = np.random.default_rng(0)
+    x = np.column_stack((np.arange(200), local_random.random(200)))
+    y = local_random.random((200, 2))
+    metrics = {
+        "x_distance_metrics": [lambda x: x[:, 1]],
+        "y_distance_metrics": [lambda y: -np.sum(y, axis=1)],
+    }
+    for pop in (1, 17, 50, 199, 200, 250):
+        x_ref, _, rank_ref, _ = sortMO(x, y, **metrics)
+        x_new, y_new, rank_new = remove_worst(x, y, pop, **metrics)
+        survivors = x_new[:, 0].astype(int)
+        assert np.array_equal(np.sort(survivors), np.sort(x_ref[:pop, 0]))
+        assert np.array_equal(y_new, y[survivors])
+        assert np.array_equal(rank_new, rank_ref[:pop])
+
+
+def test_remove_worst_crowding_on_split_front():
+    local_random = np.random.default_rng(1)
+    y = local_random.random((100, 2))
+    x = np.arange(100, dtype=float).reshape((-1, 1))
+    rank = dda_non_dominated_sort(y)
+    counts = np.cumsum(np.bincount(rank))
+    pop = counts[2] + (counts[3] - counts[2]) // 2
+    _, y_new, rank_new = remove_worst(x, y, pop, y_distance_metrics=["crowding"])
+
+    assert np.array_equal(rank_new, np.sort(rank)[:pop])
+    front = np.flatnonzero(rank == 3)
+    k = pop - counts[2]
+    crowding = crowding_distance(y[front])
+    expected = front[np.argsort(-crowding, kind="stable")[:k]]
+    assert np.array_equal(y_new[counts[2] :], y[expected])
+
+
+def test_batched_operators_match_per_parent_operators():
+    parents1 = np.random.default_rng(2).random((20, 4))
+    parents2 = np.random.default_rng(3).random((20, 4))
+    xlb = np.zeros(4)
+    xub = np.ones(4)
+    di = np.asarray([1.0, 5.0, 20.0, 100.0])
+    for nchildren in (1, 3):
+        local_random = np.random.default_rng(4)
+        children1, children2 = crossover_sbx_batch(
+            local_random, parents1, parents2, di, xlb, xub, nchildren=nchildren
+        )
+        mutants = mutation_batch(
+            local_random, parents1, di, xlb, xub, mutation_rate=0.3, nchildren=nchildren
+        )
+
+        local_random = np.random.default_rng(4)
+        expected = [
+            crossover_sbx(local_random, p1, p2, di, xlb, xub, nchildren=nchildren)
+            for p1, p2 in zip(parents1, parents2)
+        ]
+        assert np.array_equal(children1, np.vstack([c1 for c1, _ in expected]))
+        assert np.array_equal(children2, np.vstack([c2 for _, c2 in expected]))
+        expected = [
+            mutation(local_random, p, di, xlb, xub, 0.3, nchildren=nchildren)
+            for p in parents1
+        ]
+        assert np.array_equal(mutants, np.vstack(expected))
+
+
+def test_generate_offspring_counts():
+    pool = np.random.default_rng(5).random((10, 3))
+    xlb = np.zeros(3)
+    xub = np.ones(3)
+    local_random = np.random.default_rng(6)
+    assert generate_offspring(
+        local_random, pool, 0, 0.9, 0.1, 20.0, 20.0, xlb, xub
+    ).shape == (0, 3)
+    for nchildren in (1, 2, 5):
+        x_gen = generate_offspring(
+            local_random, pool, 99, 0.9, 0.5, 20.0, 20.0, xlb, xub, nchildren=nchildren
+        )
+        assert 99 <= len(x_gen) < 99 + 3 * nchildren
+        assert np.all((x_gen >= 0.0) & (x_gen <= 1.0))
+    # with mutation only, every offspring is one of nchildren mutants of
+    # a pool member, so the offspring come in groups of nchildren
+    x_gen = generate_offspring(
+        local_random, pool, 12, 0.0, 1.0, 20.0, 1e6, xlb, xub, nchildren=4
+    )
+    assert x_gen.shape == (12, 3)
+    nearest = np.argmin(np.linalg.norm(x_gen[:, None] - pool, axis=2), axis=1)
+    assert np.all(nearest.reshape((3, 4)) == nearest[::4, None])
+
+
+def test_crowding_distance_fronts_matches_per_front():
+    Y = np.random.default_rng(7).random((30, 3))
+    labels = np.repeat([2, 0, 1, 3], [12, 10, 7, 1])
+    D = crowding_distance_fronts(Y, labels)
+    for label in range(4):
+        front = labels == label
+        assert np.array_equal(D[front], crowding_distance(Y[front]))
+
+
+def cdist_duplicates(X, Y=None, eps=1e-16):
+    # the previous implementation, with a full distance matrix
+    if Y is None:
+        Y = X
+    D = cdist(X, Y)
+    D[np.triu_indices(len(X), m=len(Y))] = np.inf
+    D[np.isnan(D)] = np.inf
+    return np.any(D <= eps, axis=1)
+
+
+def test_get_duplicates_matches_distance_matrix():
+    local_random = np.random.default_rng(8)
+    X = local_random.integers(0, 3, size=(60, 2)).astype(np.float64)
+    X[::2] += local_random.random((30, 2)) * 1e-3
+    X[7, 1] = np.nan
+    for eps in (1e-16, 2e-3):
+        assert np.array_equal(get_duplicates(X, eps=eps), cdist_duplicates(X, eps=eps))
+    Y = X[::-1].copy()
+    assert np.array_equal(
+        get_duplicates(X, Y, eps=2e-3), cdist_duplicates(X, Y, eps=2e-3)
+    )
+
+
+def test_tournament_selection_matches_reduce():
+    # the previous implementation accumulated the probabilities with reduce
+    rank = np.random.default_rng(9).integers(0, 5, size=40)
+    prob, _ = reduce(tournament_prob, np.arange(40), ([], 0.5))
+    prob = np.asarray(prob) / np.sum(prob)
+    expected = np.random.default_rng(10).choice(
+        np.lexsort((rank,)), size=20, p=prob, replace=False
+    )
+    poolidx = tournament_selection(np.random.default_rng(10), 40, 20, rank)
+    assert np.array_equal(poolidx, expected)
+    assert tournament_prob(([0.25], 0.5), 2) == ([0.25, 0.125], 0.5)
+
+
+def velocity_vector_loop(local_random, position, velocity, archive, crowding, xlb, xub):
+    # the previous single-swarm implementation
+    r1, r2 = local_random.uniform(low=0.0, high=1.0, size=2)
+    w = local_random.uniform(low=0.1, high=0.5)
+    c1, c2 = local_random.uniform(low=1.5, high=2.5, size=2)
+    phi = c1 + c2 if c1 + c2 > 4 else 0
+    chi = 2 / (2 - phi - ((phi**2) - 4 * phi) ** (1 / 2))
+    ind_1, ind_2 = local_random.integers(low=0, high=archive.shape[0], size=2)
+    if crowding[ind_1] < crowding[ind_2]:
+        ind_1, ind_2 = ind_2, ind_1
+    output = (
+        w * velocity
+        + c1 * r1 * (archive[ind_1] - position)
+        + c2 * r2 * (archive[ind_2] - position)
+    ) * chi
+    return np.clip(output, -(xub - xlb) / 2, (xub - xlb) / 2)
+
+
+def test_smpso_velocity_matches_single_swarm_loop():
+    data = np.random.default_rng(11)
+    position, velocity, archive = data.random((3, 8, 4))
+    crowding = data.random(8)
+    xlb = np.zeros(4)
+    xub = 2.0 * np.ones(4)
+    expected = velocity_vector_loop(
+        np.random.default_rng(12), position, velocity, archive, crowding, xlb, xub
+    )
+    output = velocity_vector(
+        np.random.default_rng(12),
+        position[None],
+        velocity[None],
+        archive[None],
+        crowding[None],
+        xlb,
+        xub,
+    )
+    assert np.allclose(output[0], expected)
+
+
+def test_smpso_swarms_merge_their_own_offspring():
+    popsize, swarm_size = 10, 2
+    local_random = np.random.default_rng(13)
+    optimizer = SMPSO(
+        popsize=popsize,
+        nInput=2,
+        nOutput=2,
+        model=Struct(feasibility=None, objective=None),
+        distance_metric="crowding",
+        swarm_size=swarm_size,
+    )
+    bounds = np.asarray([[0.0, 1.0], [0.0, 1.0]])
+    x = local_random.random((popsize * swarm_size, 2))
+    optimizer.initialize_strategy(x, 2.0 + x, bounds, local_random)
+    x_gen, state = optimizer.generate()
+    # only the offspring of the second swarm improve on the populations
+    y_gen = np.full((len(x_gen), 2), 5.0)
+    own = slice(2 * popsize, 4 * popsize)
+    y_gen[own] = local_random.random((2 * popsize, 2))
+    optimizer.update(x_gen, y_gen, state)
+
+    population = optimizer.state.population_parm
+    assert np.all(np.isin(population[1], x_gen[own]))
+    assert np.array_equal(
+        np.sort(population[0], axis=0), np.sort(x[:popsize].astype(np.float32), axis=0)
+    )
+
+
+def survival_score_meshgrid(y, front, ideal_point):
+    # the previous implementation, which re-partitions the selected x
+    # remaining distance matrix at every greedy step
+    yfront = y[front, :] - ideal_point
+    m = len(front)
+    extreme = find_corner_solutions(yfront)
+    normalization = normalize(yfront, extreme)
+    ynfront = yfront / normalization
+    p = get_geometry(ynfront, extreme)
+    crowd_dist = np.zeros(m)
+    crowd_dist[extreme] = np.inf
+    selected = np.full(m, False)
+    selected[extreme] = True
+    nn = np.linalg.norm(ynfront, p, axis=1)
+    diff = np.abs(ynfront[:, None, :] - ynfront[None, :, :])
+    distances = np.power(np.power(diff, p).sum(axis=2), 1.0 / p) / nn[:, None]
+    remaining = list(np.flatnonzero(~selected))
+    for i in range(m - np.sum(selected)):
+        D_mg = distances[np.ix_(np.flatnonzero(selected), remaining)].T
+        if D_mg.shape[1] > 1:
+            tmp = np.sum(np.partition(D_mg, 1, axis=1)[:, :2], axis=1)
+        else:
+            tmp = D_mg[:, 0]
+        index = np.argmax(tmp)
+        best = remaining.pop(index)
+        selected[best] = True
+        crowd_dist[best] = tmp[index]
+    return normalization, p, crowd_dist
+
+
+def test_age_moea_survival_score_matches_meshgrid():
+    data = np.random.default_rng(14)
+    for d, q in ((2, 1.0), (3, 2.0), (3, 0.5)):
+        y = data.random((80, d))
+        y /= np.linalg.norm(y, q, axis=1, keepdims=True)
+        front = np.arange(5, 75)
+        ideal_point = np.min(y[front], axis=0)
+        normalization, p, crowd_dist = survival_score(y, front, ideal_point)
+        expected = survival_score_meshgrid(y, front, ideal_point)
+        assert np.allclose(normalization, expected[0])
+        assert p == expected[1]
+        assert np.allclose(crowd_dist, expected[2])
+
+
+def update_cholesky_loop(A, Ainv, z, psucc, pc, cc, ccov, pthresh):
+    # the previous single-factor implementation
+    if psucc < pthresh:
+        pc = (1.0 - cc) * pc + np.sqrt(cc * (2.0 - cc)) * z
+        alpha = 1.0 - ccov
+    else:
+        pc = (1.0 - cc) * pc
+        alpha = (1.0 - ccov) + ccov * cc * (2.0 - cc)
+    w = np.dot(Ainv, pc)
+    if w.max() > 1e-20:
+        a = np.sqrt(alpha)
+        norm_w2 = np.sum(w**2)
+        root = np.sqrt(1 + ccov / alpha * norm_w2)
+        b = a / norm_w2 * (root - 1)
+        A = a * A + b * np.outer(pc, w.T)
+        c = 1.0 / (a * norm_w2) * (1.0 - 1.0 / root)
+        Ainv = (1.0 / a) * Ainv - c * w * (w.T * Ainv)
+    return A, Ainv, pc
+
+
+def cmaes_update_loop(optimizer, x_gen, y_gen, p_idxs):
+    # the previous implementation, which updates the offspring and their
+    # parents one candidate at a time
+    s, params = optimizer.state, optimizer.opt_params
+    cp, d, ptarg = params.cp, params.d, params.ptarg
+    xrng = optimizer.bounds[:, 1] - optimizer.bounds[:, 0]
+    P = len(s.parents_x)
+    candidates_x = np.vstack((x_gen, s.parents_x))
+    candidates_y = np.vstack((y_gen, s.parents_y))
+    offspring = np.arange(len(candidates_x)) < len(x_gen)
+    pidxs = np.concatenate((p_idxs, np.arange(P)))
+    chosen, not_chosen = optimizer._select(candidates_x, candidates_y, offspring, pidxs)
+    sigmas, A, Ainv = s.sigmas[pidxs], s.A[pidxs], s.Ainv[pidxs]
+    pc, psucc = s.pc[pidxs], s.psucc[pidxs]
+    for ind in np.flatnonzero(chosen & offspring):
+        p_idx = pidxs[ind]
+        last_step = sigmas[ind].copy()
+        psucc[ind] = (1.0 - cp) * psucc[ind] + cp
+        sigmas[ind] = sigmas[ind] * np.exp((psucc[ind] - ptarg) / (d * (1.0 - ptarg)))
+        z = (candidates_x[ind] - s.parents_x[p_idx]) / xrng / last_step
+        A[ind], Ainv[ind], pc[ind] = update_cholesky_loop(
+            A[ind],
+            Ainv[ind],
+            z,
+            psucc[ind],
+            pc[ind],
+            params.cc,
+            params.ccov,
+            params.pthresh,
+        )
+        s.psucc[p_idx] = (1.0 - cp) * s.psucc[p_idx] + cp
+        s.sigmas[p_idx] *= np.exp((s.psucc[p_idx] - ptarg) / (d * (1.0 - ptarg)))
+    for ind in np.flatnonzero(not_chosen & offspring):
+        p_idx = pidxs[ind]
+        s.psucc[p_idx] = (1.0 - cp) * s.psucc[p_idx]
+        s.sigmas[p_idx] *= np.exp((s.psucc[p_idx] - ptarg) / (d * (1.0 - ptarg)))
+    parents = chosen & ~offspring
+    sigmas[parents] = s.sigmas[pidxs[parents]]
+    psucc[parents] = s.psucc[pidxs[parents]]
+    return Struct(
+        parents_x=candidates_x[chosen],
+        parents_y=candidates_y[chosen],
+        sigmas=sigmas[chosen],
+        A=A[chosen],
+        Ainv=Ainv[chosen],
+        pc=pc[chosen],
+        psucc=psucc[chosen],
+    )
+
+
+def test_cmaes_update_matches_loop():
+    def zdt1(x):
+        g = 1.0 + 9.0 * np.mean(x[:, 1:], axis=1)
+        return np.column_stack((x[:, 0], g * (1.0 - np.sqrt(x[:, 0] / g))))
+
+    popsize, nInput = 12, 4
+    bounds = np.column_stack((np.zeros(nInput), np.ones(nInput)))
+    local_random = np.random.default_rng(15)
+    x = local_random.random((popsize, nInput))
+    for lambda_ in (1, 3):
+        optimizer = CMAES(
+            popsize=popsize,
+            nInput=nInput,
+            nOutput=2,
+            model=Struct(feasibility=None, objective=None),
+            distance_metric="crowding",
+            lambda_=lambda_,
+            sigma=0.5,
+        )
+        optimizer.initialize_strategy(
+            x, zdt1(x), bounds, np.random.default_rng(16 + lambda_)
+        )
+        for _ in range(5):
+            x_gen, state = optimizer.generate()
+            x_gen = np.clip(x_gen, 0.0, 1.0)
+            y_gen = zdt1(x_gen)
+            previous = optimizer.state
+            optimizer.state = Struct(
+                **{k: np.copy(v) for k, v in previous.__dict__.items()}
+            )
+            expected = cmaes_update_loop(optimizer, x_gen, y_gen, state["p_idx"])
+            optimizer.state = previous
+            optimizer.update(x_gen, y_gen, state)
+            for key in ("parents_x", "parents_y", "sigmas", "A", "Ainv", "pc", "psucc"):
+                assert np.allclose(
+                    getattr(optimizer.state, key), getattr(expected, key)
+                ), key
+
+
+def test_cmaes_select_keeps_small_candidate_sets():
+    optimizer = CMAES(
+        popsize=10,
+        nInput=2,
+        nOutput=2,
+        model=Struct(feasibility=None, objective=None),
+        distance_metric="crowding",
+    )
+    candidates = np.random.default_rng(17).random((8, 2))
+    chosen, not_chosen = optimizer._select(
+        candidates, candidates, np.ones(8, dtype=bool), np.arange(8)
+    )
+    assert np.all(chosen) and not np.any(not_chosen)